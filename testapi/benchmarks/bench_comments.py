@@ -0,0 +1,158 @@
+"""Time /comments/ and /top/ before and after the comment indexes.
+
+Fills the comments table with a synthetic history inside a transaction,
+times the requests with the old single movie_id index and then with
+the (movie, created_at) and created_at indexes. Everything is rolled
+back afterwards:
+
+    python -m benchmarks.bench_comments --comments 10000000
+"""
+import argparse
+import os
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapi.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from movies import rollups, top_cache  # noqa: E402
+from movies.models import Movie  # noqa: E402
+
+
+NEW_INDEXES = (
+    'movies_comm_movie_i_0a8795_idx', 'movies_comm_created_38e8ea_idx'
+)
+
+GENERATE_MOVIES = """
+INSERT INTO movies_movie (
+    imdb_id, title, year, rated, released, runtime, genre, director,
+    writer, actors, plot, language, country, awards, poster, ratings,
+    metascore, imdb_rating, imdb_votes, type, dvd, box_office,
+    production, website, comment_count, updated_at
+)
+SELECT
+    'bench' || i, 'Movie ' || i, 2000, '', date '2000-01-01', '', '{}',
+    '', '', '', '', '{}', '{}', '', '', '[]'::jsonb, 0, '', 0, 'movie',
+    date '2000-01-01', '', '', '', 0, now()
+FROM generate_series(0, %s - 1) AS i
+"""
+
+GENERATE_COMMENTS = """
+INSERT INTO movies_comment (movie_id, created_at, updated_at, text)
+SELECT movie_id, created_at, created_at, text FROM (
+    SELECT
+        'bench' || (i %% %s) AS movie_id,
+        now() - interval '365 days' * random() AS created_at,
+        'comment ' || i AS text
+    FROM generate_series(1, %s) AS i
+) AS comments
+"""
+
+
+def execute(*statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def get_cases(client):
+    now = timezone.now()
+    date_after, date_before = (now - timedelta(days=30)).date(), now.date()
+
+    def get(url):
+        def request():
+            top_cache.invalidate_now()
+            response = client.get(url)
+            assert response.status_code == 200, response.content
+        return request
+
+    def top_from_comments():
+        list(Movie.objects.filter(
+            comments__created_at__range=(now - timedelta(days=30), now)
+        ).annotate(
+            total_comments=Count('comments')
+        ).order_by('-total_comments')[:rollups.TOP_MOVIES_LIMIT])
+
+    return [
+        ('/comments/?movie=', get('/comments/?movie=bench42')),
+        (
+            '/comments/?movie=&ordering=-created_at',
+            get('/comments/?movie=bench42&ordering=-created_at')
+        ),
+        (
+            '/comments/?created_after=',
+            get(f'/comments/?created_after={date_after}')
+        ),
+        (
+            '/top/',
+            get(f'/top/?date_after={date_after}&date_before={date_before}')
+        ),
+        ('top from comments', top_from_comments),
+    ]
+
+
+def bench(movies, comments, repeat):
+    settings.ALLOWED_HOSTS = ['testserver']
+    start = time.perf_counter()
+    # Check foreign keys right away, pending checks block CREATE INDEX.
+    execute('SET CONSTRAINTS ALL IMMEDIATE')
+    execute(*(f'DROP INDEX {name}' for name in NEW_INDEXES))
+    with connection.cursor() as cursor:
+        cursor.execute(GENERATE_MOVIES, [movies])
+        cursor.execute(GENERATE_COMMENTS, [movies, comments])
+    rollups.rebuild()
+    elapsed = time.perf_counter() - start
+    print(f'inserted {comments} comments in {elapsed:.1f}s')
+
+    cases = get_cases(Client())
+    execute(
+        'CREATE INDEX bench_comment_movie_id ON movies_comment (movie_id)',
+        'ANALYZE movies_comment'
+    )
+    before = [best_time(function, repeat) for _, function in cases]
+    execute(
+        'DROP INDEX bench_comment_movie_id',
+        'CREATE INDEX movies_comm_movie_i_0a8795_idx '
+        'ON movies_comment (movie_id, created_at, id)',
+        'CREATE INDEX movies_comm_created_38e8ea_idx '
+        'ON movies_comment (created_at, id)',
+        'ANALYZE movies_comment'
+    )
+    after = [best_time(function, repeat) for _, function in cases]
+
+    print(f'{"request":>40} {"before":>10} {"after":>10}')
+    for (name, _), old, new in zip(cases, before, after):
+        print(f'{name:>40} {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--movies', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=10000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    with transaction.atomic():
+        bench(args.movies, args.comments, args.repeat)
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compare OMDb fetch pipelines and load test POST /movies/.
+
+Without --url the sequential, thread pool and asyncio fetch paths are
+timed against an in-process stub OMDb api:
+
+    python -m benchmarks.bench_omdb_fetch --requests 200 --concurrency 20
+
+With --url concurrent POST /movies/ requests are sent to a running server
+(WSGI or ASGI), which should have OMDB_API_URL pointing at
+``python -m benchmarks.stub_omdb``:
+
+    python -m benchmarks.bench_omdb_fetch --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapi.settings')
+
+
+def bench_pipelines(requests, concurrency, latency):
+    from benchmarks.stub_omdb import start_stub_server
+
+    server, url = start_stub_server(latency=latency)
+    os.environ['OMDB_API_URL'] = url
+    os.environ['OMDB_POOL_SIZE'] = str(concurrency)
+    django.setup()
+    from movies import async_services, services
+
+    def titles():
+        return [uuid.uuid4().hex for _ in range(requests)]
+
+    def sequential():
+        for title in titles():
+            services.fetch_movie_omdapi(title)
+
+    def threads():
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(services.fetch_movie_omdapi, titles()))
+
+    def asyncio_():
+        async_services.fetch_many(titles(), concurrency)
+
+    print(f'{requests} lookups, {latency * 1000:.0f}ms upstream latency')
+    for name, pipeline in (
+            ('sequential', sequential), ('threads', threads),
+            ('asyncio', asyncio_)):
+        start = time.perf_counter()
+        pipeline()
+        elapsed = time.perf_counter() - start
+        print(f'{name:>12}: {elapsed:7.2f}s {requests / elapsed:8.1f} req/s')
+    server.shutdown()
+
+
+async def _post_movies(url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def post(session):
+        async with semaphore:
+            start = time.perf_counter()
+            async with session.post(
+                    f'{url}/movies/', data={'title': uuid.uuid4().hex}) as r:
+                await r.read()
+                statuses[r.status] = statuses.get(r.status, 0) + 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(force_close=True)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(post(session) for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f'{requests} POSTs, concurrency {concurrency}: {elapsed:.2f}s, '
+          f'{requests / elapsed:.1f} req/s, statuses {statuses}')
+    print(f'p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help='Base url of a running server.')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.1)
+    args = parser.parse_args()
+    if args.url:
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(
+            _post_movies(args.url.rstrip('/'), args.requests, args.concurrency)
+        )
+    else:
+        bench_pipelines(args.requests, args.concurrency, args.latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Compare full text search on /movies/ with an ILIKE scan.
+
+Fills movies_movie with a synthetic catalogue inside a transaction,
+which is rolled back afterwards unless --keep is given:
+
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapi.settings')
+django.setup()
+
+from django.contrib.postgres.search import SearchQuery, SearchRank  # noqa
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import F, Q  # noqa: E402
+
+from movies.models import Movie  # noqa: E402
+
+
+WORDS = (
+    'heist', 'space', 'detective', 'love', 'war', 'robot', 'island',
+    'dragon', 'murder', 'journey', 'ghost', 'revenge', 'family', 'storm'
+)
+SEARCH_FIELDS = ('title', 'director', 'writer', 'actors', 'plot')
+QUERIES = ('heist', 'robot revenge', 'dragon island storm', 'Actor 4242')
+
+GENERATE_MOVIES = """
+INSERT INTO movies_movie (
+    imdb_id, title, year, rated, released, runtime, genre, director,
+    writer, actors, plot, language, country, awards, poster, ratings,
+    metascore, imdb_rating, imdb_votes, type, dvd, box_office,
+    production, website, comment_count, updated_at
+)
+SELECT
+    'bench' || i,
+    initcap(w[1 + i %% 14]) || ' ' || initcap(w[1 + (i / 14) %% 14]) || ' ' || i,
+    1950 + i %% 70, 'PG', date '2000-01-01', '90 min', ARRAY['Drama'],
+    'Director ' || i %% 5000, 'Writer ' || i %% 7000,
+    'Actor ' || i %% 9000 || ', Actor ' || i %% 11000,
+    'A story about ' || w[1 + (i / 196) %% 14] || ' and ' ||
+        w[1 + (i / 2744) %% 14] || ' number ' || i,
+    ARRAY['English'], ARRAY['USA'], '', '', '[]'::jsonb,
+    50, '7.0', 1000, 'movie', date '2000-06-01', '', '', '', 0, now()
+FROM generate_series(1, %s) AS i, (SELECT %s::text[] AS w) AS words
+"""
+
+
+def timed(queryset, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(queryset.all())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench(rows, repeat, page_size):
+    with connection.cursor() as cursor:
+        start = time.perf_counter()
+        cursor.execute(GENERATE_MOVIES, [rows, list(WORDS)])
+        cursor.execute('ANALYZE movies_movie')
+        print(f'inserted {rows} rows in {time.perf_counter() - start:.1f}s')
+
+    print(f'{"query":>22} {"matches":>9} {"search":>10} {"ilike":>10}')
+    movies = Movie.objects.defer('search_vector')
+    for terms in QUERIES:
+        query = SearchQuery(terms, config='english')
+        search = movies.annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).filter(search_vector=query).order_by('-search_rank', 'pk')
+        ilike = movies.order_by('pk')
+        for word in terms.split():
+            condition = Q()
+            for field_name in SEARCH_FIELDS:
+                condition |= Q(**{f'{field_name}__icontains': word})
+            ilike = ilike.filter(condition)
+        print(
+            f'{terms:>22} {search.count():>9} '
+            f'{timed(search[:page_size], repeat) * 1000:>8.1f}ms '
+            f'{timed(ilike[:page_size], repeat) * 1000:>8.1f}ms'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument(
+        '--keep', action='store_true', help='Keep the generated rows.'
+    )
+    args = parser.parse_args()
+    with transaction.atomic():
+        bench(args.rows, args.repeat, args.page_size)
+        if not args.keep:
+            transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Compare MovieSerializer with the fast list serialization path.
+
+Run from the project directory: python -m benchmarks.bench_serialization
+No database is needed, rows are built in memory.
+"""
+import os
+import timeit
+from datetime import date
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapi.settings')
+django.setup()
+
+from movies import fast_serializers  # noqa: E402
+from movies.models import Movie  # noqa: E402
+from movies.serializers import MovieSerializer  # noqa: E402
+
+
+ROW = {
+    'title': 'TestMovie',
+    'year': 2018,
+    'rated': 'PG-13',
+    'released': date(2018, 6, 1),
+    'runtime': '65 min',
+    'genre': ['Action', 'Sci-Fi'],
+    'director': 'Kowalski',
+    'writer': 'John Smith',
+    'actors': 'Joseph Marshall, Ian King',
+    'plot': 'Some twisted plot',
+    'language': ['English', 'French'],
+    'country': ['USA', 'UK'],
+    'awards': 'Won 2 Oscars.',
+    'poster': 'some-poster-path',
+    'ratings': [
+        {'Source': 'Internet Movie Database', 'Value': '5.8/10'},
+        {'Source': 'Rotten Tomatoes', 'Value': '66%'}
+    ],
+    'metascore': 65,
+    'imdb_rating': '5.9',
+    'imdb_votes': 54951,
+    'type': 'movie',
+    'dvd': date(2018, 8, 11),
+    'box_office': '$512,841',
+    'production': 'Some company',
+    'website': 'some-website',
+    'comment_count': 0
+}
+
+
+def main(repeat=5, number=200):
+    print(f'{"page size":>10} {"serializer":>12} {"fast path":>12} {"speedup":>8}')
+    for page_size in (10, 100):
+        rows = [dict(ROW, imdb_id=f'tt{i}') for i in range(page_size)]
+
+        def serializer_path():
+            instances = [Movie(**row) for row in rows]
+            return MovieSerializer(instances, many=True).data
+
+        def fast_path():
+            columns = fast_serializers.get_columns(MovieSerializer)
+            return fast_serializers.serialize_rows(columns, rows)
+
+        assert serializer_path() == fast_path()
+        slow = min(timeit.repeat(serializer_path, repeat=repeat, number=number))
+        fast = min(timeit.repeat(fast_path, repeat=repeat, number=number))
+        print(
+            f'{page_size:>10} {slow / number * 1000:>10.3f}ms '
+            f'{fast / number * 1000:>10.3f}ms {slow / fast:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
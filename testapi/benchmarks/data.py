@@ -0,0 +1,114 @@
+"""Synthetic catalogue and comment history for benchmarks.
+
+Rows are generated in SQL from a fixed seed, the same sizes always give
+the same data. Comments are skewed towards a few popular movies and
+towards recent days, like real traffic.
+"""
+from django.db import connection
+
+from movies import rollups
+
+
+GENRES = [
+    'Action', 'Adventure', 'Comedy', 'Crime', 'Drama', 'Fantasy',
+    'Horror', 'Romance', 'Sci-Fi', 'Thriller'
+]
+LANGUAGES = ['English', 'French', 'German', 'Spanish', 'Japanese']
+COUNTRIES = ['USA', 'UK', 'France', 'Germany', 'Japan']
+TABLES = (
+    'movies_movie', 'movies_comment', 'movies_dailycommentcount'
+)
+WORDS = [
+    'heist', 'space', 'detective', 'love', 'war', 'robot', 'island',
+    'dragon', 'murder', 'journey', 'ghost', 'revenge', 'family', 'storm'
+]
+
+# The "0 * i" keeps the genre and value subqueries correlated, so they
+# are evaluated for every row instead of once.
+GENERATE_MOVIES = """
+INSERT INTO movies_movie (
+    imdb_id, title, year, rated, released, runtime, genre, director,
+    writer, actors, plot, language, country, awards, poster, ratings,
+    metascore, imdb_rating, imdb_votes, type, dvd, box_office,
+    production, website, imdb_rating_value, runtime_minutes,
+    box_office_amount, comment_count, updated_at
+)
+SELECT
+    'tt' || lpad(i::text, 8, '0'),
+    initcap(w[1 + i %% 14]) || ' ' || initcap(w[1 + i / 14 %% 14])
+        || ' ' || i,
+    1950 + (random() * 70)::int, 'PG-13', date '2000-01-01',
+    v.runtime || ' min',
+    ARRAY(
+        SELECT g FROM unnest(%(genres)s::text[]) AS g
+        WHERE random() < 0.25 + 0 * i
+    ),
+    'Director ' || i %% 5000, 'Writer ' || i %% 7000,
+    'Actor ' || i %% 9000 || ', Actor ' || i %% 11000,
+    'A story about ' || w[1 + (random() * 13)::int]
+        || ' and ' || w[1 + (random() * 13)::int],
+    ARRAY[(%(languages)s::text[])[1 + (random() * random() * 4)::int]],
+    ARRAY[(%(countries)s::text[])[1 + (random() * random() * 4)::int]],
+    '', '', '[]'::jsonb, (random() * 100)::int,
+    v.rating::text, (random() * 1000000)::int, 'movie',
+    date '2000-06-01', '$' || to_char(v.box_office, 'FM999,999,999'), '',
+    '', v.rating, v.runtime, v.box_office, 0,
+    now() - interval '365 days' * random()
+FROM generate_series(0, %(count)s - 1) AS i, (
+    SELECT %(words)s::text[] AS w
+) AS words, LATERAL (
+    SELECT
+        round((1 + random() * 9)::numeric, 1) + 0 * i AS rating,
+        70 + (random() * 110)::int AS runtime,
+        (random() * 500000000)::bigint AS box_office
+) AS v
+"""
+
+# A movie index of count * random()^3 puts most comments on a few
+# movies, an age of random()^2 most of them on recent days.
+GENERATE_COMMENTS = """
+INSERT INTO movies_comment (movie_id, created_at, updated_at, text)
+SELECT movie_id, created_at, created_at, text FROM (
+    SELECT
+        'tt' || lpad(
+            floor(%(movies)s * power(random(), 3))::int::text, 8, '0'
+        ) AS movie_id,
+        now() - interval '730 days' * power(random(), 2) AS created_at,
+        'comment ' || i AS text
+    FROM generate_series(1, %(count)s) AS i
+) AS comments
+"""
+
+
+def movie_id(index):
+    """Id of the index-th generated movie, 0 is the most commented."""
+    return 'tt' + str(index).zfill(8)
+
+
+def vacuum():
+    """Clean up dead rows of earlier runs, they skew the timings.
+
+    Generated rows are rolled back but stay in the tables and indexes
+    until vacuumed. Has to run outside of a transaction.
+    """
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f'VACUUM ANALYZE {table}')
+
+
+def generate(movies, comments, seed=0.42):
+    """Insert movies and comments and fill the comment rollups."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT setseed(%s)', [seed])
+        cursor.execute(GENERATE_MOVIES, {
+            'count': movies, 'genres': GENRES, 'languages': LANGUAGES,
+            'countries': COUNTRIES, 'words': WORDS
+        })
+        cursor.execute(GENERATE_COMMENTS, {
+            'movies': movies, 'count': comments
+        })
+    rollups.rebuild()
+    rollups.reconcile_movie_comment_counts()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE movies_movie')
+        cursor.execute('ANALYZE movies_comment')
@@ -0,0 +1,78 @@
+"""Stub OMDb api answering every lookup after a fixed delay.
+
+Run standalone with ``python -m benchmarks.stub_omdb --port 8765`` and point
+OMDB_API_URL at it, or start it in-process with start_stub_server().
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+
+def movie_content(title):
+    imdb_id = 'tt' + str(int(hashlib.md5(title.encode()).hexdigest(), 16))[:7]
+    return {
+        'Title': title, 'Year': '2018', 'Rated': 'PG-13',
+        'Released': '01 Jun 2018', 'Runtime': '65 min',
+        'Genre': 'Action, Sci-Fi', 'Director': 'Kowalski',
+        'Writer': 'John Smith', 'Actors': 'Joseph Marshall, Ian King',
+        'Plot': 'Some twisted plot', 'Language': 'English, French',
+        'Country': 'USA, UK', 'Awards': 'Won 2 Oscars.',
+        'Poster': 'some-poster-path',
+        'Ratings': [{'Source': 'Internet Movie Database', 'Value': '5.8/10'}],
+        'Metascore': '65', 'imdbRating': '5.9', 'imdbVotes': '54,951',
+        'imdbID': imdb_id, 'Type': 'movie', 'DVD': '11 Aug 2018',
+        'BoxOffice': '$512,841', 'Production': 'Some company',
+        'Website': 'some-website', 'Response': 'True'
+    }
+
+
+class StubOmdbHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.1
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        query = parse_qs(urlparse(self.path).query)
+        title = (query.get('t') or query.get('i') or ['unknown'])[0]
+        body = json.dumps(movie_content(title)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+def start_stub_server(port=0, latency=0.1):
+    """Start stub server in a daemon thread, return it with its url."""
+    handler = type('Handler', (StubOmdbHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.1)
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency)
+    print(f'Stub OMDb api listening on {url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,215 @@
+"""Latency and query count of the read endpoints at fixed data scales.
+
+Generates a synthetic catalogue inside a transaction, requests every
+endpoint case a number of times and reports p50/p99 latency and queries
+per request. Everything is rolled back afterwards. Results can be saved
+as a JSON baseline and later runs compared against it, the run fails
+when a case got slower than the tolerance allows or runs more queries:
+
+    python -m benchmarks.suite --scale small --save
+    python -m benchmarks.suite --scale small --compare
+
+Baselines live in benchmarks/baselines/<scale>.json by default. Latency
+depends on the machine, compare runs from the same host only.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapi.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks import data  # noqa: E402
+from movies import instrumentation, top_cache  # noqa: E402
+
+
+SCALES = {
+    'small': {'movies': 1000, 'comments': 50000},
+    'medium': {'movies': 10000, 'comments': 1000000},
+    'large': {'movies': 100000, 'comments': 10000000},
+}
+
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of values."""
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def get_cases():
+    today = timezone.now().date()
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    popular, tail = data.movie_id(0), data.movie_id(500)
+    return [
+        ('movies', '/movies/', False),
+        ('movies_page', '/movies/?page=5', False),
+        ('movies_filter', '/movies/?genre=Drama&year__gte=2000', False),
+        ('movies_arrays', '/movies/?language__overlap=French,German', False),
+        ('movies_ordering', '/movies/?ordering=-imdb_votes', False),
+        ('movies_search', '/movies/?search=heist', False),
+        ('comments_popular', f'/comments/?movie={popular}', False),
+        ('comments_tail', f'/comments/?movie={tail}', False),
+        ('comments_recent', f'/comments/?created_after={week_ago}', False),
+        (
+            'top', f'/top/?date_after={month_ago}&date_before={today}',
+            False
+        ),
+        (
+            'top_cached',
+            f'/top/?date_after={month_ago}&date_before={today}', True
+        ),
+    ]
+
+
+def measure(client, url, cached, iterations, warmup):
+    durations, queries = [], []
+    for iteration in range(warmup + iterations):
+        if not cached:
+            top_cache.invalidate_now()
+        with instrumentation.collect() as stats:
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.content
+        if iteration >= warmup:
+            durations.append(elapsed)
+            queries.append(stats.query_count)
+    return {
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        'queries': max(queries),
+    }
+
+
+def run(scale, iterations, warmup):
+    settings.ALLOWED_HOSTS = ['testserver']
+    sizes = SCALES[scale]
+    start = time.perf_counter()
+    data.generate(sizes['movies'], sizes['comments'])
+    elapsed = time.perf_counter() - start
+    print(
+        f'generated {sizes["movies"]} movies and {sizes["comments"]} '
+        f'comments in {elapsed:.1f}s'
+    )
+    client = Client()
+    results = {
+        name: measure(client, url, cached, iterations, warmup)
+        for name, url, cached in get_cases()
+    }
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW server_version')
+        server_version = cursor.fetchone()[0]
+    return {
+        'scale': scale,
+        'sizes': sizes,
+        'iterations': iterations,
+        'python': platform.python_version(),
+        'postgresql': server_version,
+        'results': results,
+    }
+
+
+def compare(run, baseline, tolerance, p99_tolerance):
+    """Return regressions of run against baseline as messages."""
+    regressions = []
+    for name, result in sorted(run['results'].items()):
+        expected = baseline['results'].get(name)
+        if expected is None:
+            continue
+        limits = (('p50_ms', tolerance), ('p99_ms', p99_tolerance))
+        for key, allowed in limits:
+            if result[key] > expected[key] * (1 + allowed):
+                regressions.append(
+                    f'{name}: {key} {result[key]:.1f} exceeds '
+                    f'{expected[key]:.1f} by more than {allowed:.0%}'
+                )
+        if result['queries'] > expected['queries']:
+            regressions.append(
+                f'{name}: {result["queries"]} queries, '
+                f'baseline ran {expected["queries"]}'
+            )
+    return regressions
+
+
+def report(run, baseline=None):
+    print(f'{"case":>20} {"p50":>10} {"p99":>10} {"queries":>8}')
+    for name, result in run['results'].items():
+        line = (
+            f'{name:>20} {result["p50_ms"]:>8.1f}ms '
+            f'{result["p99_ms"]:>8.1f}ms {result["queries"]:>8}'
+        )
+        expected = baseline and baseline['results'].get(name)
+        if expected:
+            change = result['p50_ms'] / expected['p50_ms'] - 1
+            line += f'  p50 {change:+.0%} vs baseline'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument(
+        '--save', nargs='?', const='', metavar='PATH',
+        help='write the results as baseline, to the scale default path '
+             'when no path is given'
+    )
+    parser.add_argument(
+        '--compare', nargs='?', const='', metavar='PATH',
+        help='fail on regressions against a baseline'
+    )
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    # Tail latency of a few dozen requests is noisy, allow more slack.
+    parser.add_argument('--p99-tolerance', type=float, default=1.0)
+    args = parser.parse_args()
+    default_path = os.path.join(BASELINES_DIR, f'{args.scale}.json')
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare or default_path) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    data.vacuum()
+    with transaction.atomic():
+        result = run(args.scale, args.iterations, args.warmup)
+        transaction.set_rollback(True)
+    data.vacuum()
+    report(result, baseline)
+
+    if args.save is not None:
+        path = args.save or default_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as baseline_file:
+            json.dump(result, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f'saved baseline to {path}')
+
+    if baseline is not None:
+        regressions = compare(
+            result, baseline, args.tolerance, args.p99_tolerance
+        )
+        for message in regressions:
+            print(f'REGRESSION {message}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
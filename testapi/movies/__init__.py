@@ -1,4 +1,9 @@
+default_app_config = 'movies.apps.MoviesConfig'
 
 
 class OmdbApiException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class OmdbApiUnavailable(OmdbApiException):
+    pass
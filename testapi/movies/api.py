@@ -1,81 +1,255 @@
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.utils.functional import cached_property
 from rest_framework import generics, viewsets, mixins, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.filters import OrderingFilter
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
-from movies import serializers, services, OmdbApiException
-from movies.models import Comment, Movie
-
-
-class StandardResultsSetPagination(PageNumberPagination):
-
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
-class MovieViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+from movies import (
+    exports, jobs, rollups, serializers, services, top_cache,
+    OmdbApiException, OmdbApiUnavailable
+)
+from movies.fast_serializers import FastListMixin
+from movies.metrics import record_pool_stats, registry
+from movies.filters import (
+    CommentFilterSet, MovieFilterSet, MovieOrderingFilter, MovieSearchFilter
+)
+from movies.models import Comment, IngestionJob, Movie
+from movies.pagination import (
+    EstimatedCountPagination, KeysetPaginationMixin
+)
+from movies.routers import replica_reads
+from movies.versions import ConditionalListMixin
+
+
+class MovieViewSet(
+        ConditionalListMixin, KeysetPaginationMixin, FastListMixin,
+        mixins.ListModelMixin, viewsets.GenericViewSet):
 
     """Fetch movie from IMDB database on POST request."""
 
-    queryset = Movie.objects.order_by('pk')
+    queryset = Movie.objects.defer('search_vector').order_by('pk')
     serializer_class = serializers.MovieSerializer
-    filter_backends = (DjangoFilterBackend, OrderingFilter)
-    filterset_fields = ('title', 'year', 'imdb_id')
-    pagination_class = StandardResultsSetPagination
+    filter_backends = (
+        DjangoFilterBackend, MovieOrderingFilter, MovieSearchFilter
+    )
+    filterset_class = MovieFilterSet
+    ordering = ('pk',)
+    pagination_class = EstimatedCountPagination
+    version_scopes = ('movies',)
+
+    @replica_reads()
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_property
+    def list_fields(self):
+        """Field names selected with representation, fields or exclude.
+
+        Returns None when the full representation was requested.
+        """
+        params = self.request.query_params
+        serializer_class = self.get_serializer_class()
+        available = list(serializer_class().fields)
+        if 'representation' in params:
+            representations = serializer_class.Meta.representations
+            if params['representation'] not in representations:
+                raise ValidationError({'representation': [
+                    f'Choose one of: {", ".join(sorted(representations))}.'
+                ]})
+            fields = set(representations[params['representation']])
+        elif 'fields' in params:
+            fields = set(filter(None, params['fields'].split(',')))
+        else:
+            fields = set(available)
+        exclude = set(filter(None, params.get('exclude', '').split(',')))
+        unknown = (fields | exclude) - set(available)
+        if unknown:
+            raise ValidationError({'fields': [
+                f'Unknown fields: {", ".join(sorted(unknown))}.'
+            ]})
+        fields -= exclude
+        if fields == set(available):
+            return None
+        return [name for name in available if name in fields]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' and self.list_fields is not None:
+            queryset = queryset.only(*self.list_fields)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'list':
+            kwargs.setdefault('fields', self.list_fields)
+        return super().get_serializer(*args, **kwargs)
 
     def fetch_movies(self, request, *args, **kwargs):
-        title = request.data.get('title')
+        """Return the stored movie or fetch it from OMDb.
+
+        With ``refresh=true`` the movie is always re-fetched and only
+        changed columns of an existing row are updated. With
+        ``background=true`` a movie which is not stored yet is fetched by
+        an ingestion job, 202 with the job status is returned.
+        """
+        title = (request.data.get('title') or '').strip()
         if not title:
             return Response(
                 'The url parameter "title" is missing.',
                 status=status.HTTP_400_BAD_REQUEST
             )
+        refresh = self._get_flag('refresh')
+        if not refresh:
+            movie = services.get_stored_movie(title)
+            if movie is not None:
+                return Response(self.get_serializer(movie).data)
+            if self._get_flag('background'):
+                job, _ = jobs.enqueue(title)
+                serializer = serializers.IngestionJobSerializer(
+                    job, context=self.get_serializer_context()
+                )
+                return Response(
+                    serializer.data, status=status.HTTP_202_ACCEPTED,
+                    headers={'Location': serializer.data['url']}
+                )
         try:
-            data = services.fetch_movie_omdapi(title)
+            movie, created = services.ingest_movie(title, refresh=refresh)
+        except OmdbApiUnavailable as exception:
+            return Response(
+                str(exception), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except OmdbApiException as exception:
             return Response(
                 str(exception), status=status.HTTP_404_NOT_FOUND
             )
-        serializer = self.get_serializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
         return Response(
-            serializer.data, status=status.HTTP_201_CREATED
+            self.get_serializer(movie).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def _get_flag(self, name):
+        value = self.request.data.get(
+            name, self.request.query_params.get(name)
         )
+        return value in BooleanField.TRUE_VALUES
+
+    def bulk_fetch_movies(self, request, *args, **kwargs):
+        """Import a list of titles or imdbIDs, report result per item."""
+        serializer = serializers.MovieImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = services.import_movies(serializer.validated_data['titles'])
+        return Response({'results': results})
 
 
-class CommentViewSet(generics.ListCreateAPIView):
+class IngestionJobView(generics.RetrieveAPIView):
+
+    """Show status of a background movie ingestion job."""
+
+    queryset = IngestionJob.objects.select_related('movie')
+    serializer_class = serializers.IngestionJobSerializer
+
+
+class CommentViewSet(
+        ConditionalListMixin, KeysetPaginationMixin, FastListMixin,
+        generics.ListCreateAPIView):
 
     """Show and insert movie comments."""
 
-    queryset = Comment.objects.order_by('pk')
+    queryset = Comment.objects.all()
     serializer_class = serializers.CommentSerializer
-    pagination_class = StandardResultsSetPagination
-    filterset_fields = ('movie',)
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = EstimatedCountPagination
+    filterset_class = CommentFilterSet
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    ordering_fields = ('created_at', 'id')
+    ordering = ('created_at', 'pk')
 
+    @replica_reads()
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
-class TopCommentedMovieViewSet(generics.ListAPIView):
+    def get_version_scopes(self):
+        movie_id = self.request.query_params.get('movie')
+        return (f'comments:{movie_id}',) if movie_id else ('comments',)
+
+    def get_serializer(self, *args, **kwargs):
+        # A list of comments is inserted in batches.
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+
+class TopCommentedMovieViewSet(ConditionalListMixin, generics.ListAPIView):
 
     """Get movies ordered by their comment number, date filter is required."""
 
     queryset = Movie.objects.all()
     serializer_class = serializers.TopCommentedMovieSerializer
+    version_scopes = ('comments', 'movies')
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_date_range(self):
         range_serializer = serializers.DateRangeSerializer(
             data=self.request.query_params
         )
         range_serializer.is_valid(raise_exception=True)
         data = range_serializer.validated_data
-        date_range = (data['date_after'], data['date_before'])
-        return queryset.annotate(
-            total_comments=Count(
-                'comments',
-                filter=Q(comments__created_at__range=date_range)
+        return data['date_after'], data['date_before']
+
+    def get_queryset(self):
+        return rollups.top_commented_movies(*self.get_date_range())
+
+    @replica_reads()
+    def list(self, request, *args, **kwargs):
+        return self.conditional(self.cached_list, request, *args, **kwargs)
+
+    def cached_list(self, request, *args, **kwargs):
+        date_range = self.get_date_range()
+        result, generations = top_cache.get_ranking(*date_range)
+        cache_status = 'HIT'
+        if result is None:
+            cache_status = 'MISS'
+            serializer = self.get_serializer(
+                self.get_queryset(), many=True
+            )
+            result = serializer.data
+            top_cache.set_ranking(
+                *date_range, result, generations,
+                short=len(result) < rollups.TOP_MOVIES_LIMIT
             )
-        ).order_by('-total_comments')[0:5]
+        return Response(result, headers={'X-Cache': cache_status})
+
+
+class ExportView(generics.GenericAPIView):
+
+    """Stream every movie or comment as NDJSON or CSV.
+
+    The format is picked with ``?format=csv`` or the Accept header.
+    Takes the filters of the list endpoint and ``modified_since``, which
+    exports only rows changed since then.
+    """
+
+    renderer_classes = (exports.NDJSONRenderer, exports.CSVRenderer)
+    export_name = None
+
+    def get(self, request, *args, **kwargs):
+        return exports.streaming_response(
+            self.export_name, request.query_params,
+            request.accepted_renderer.format
+        )
+
+
+class TopCommentedMovieCacheStatsView(generics.GenericAPIView):
+
+    """Show hit and miss counters of the top movies cache."""
+
+    def get(self, request, *args, **kwargs):
+        return Response(top_cache.stats())
+
+
+def metrics(request):
+    """Expose request metrics of this process in Prometheus text format."""
+    record_pool_stats()
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,153 @@
+import asyncio
+from copy import deepcopy
+
+import aiohttp
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from movies import (
+    OmdbApiException, OmdbApiUnavailable, instrumentation, services
+)
+
+
+class AsyncOmdbClient:
+
+    """Asyncio OMDb api client with a pooled aiohttp session.
+
+    Shares the circuit breaker of the synchronous client, so both fail
+    fast once upstream is considered down.
+    """
+
+    def __init__(
+            self, api_key, url, pool_size, connect_timeout, read_timeout,
+            max_retries, backoff_factor, circuit_breaker):
+        self.api_key = api_key
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.circuit_breaker = circuit_breaker
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=connect_timeout, sock_read=read_timeout
+            )
+        )
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            api_key=settings.MOVIES_API_KEY,
+            url=settings.OMDB_API_URL,
+            pool_size=settings.OMDB_POOL_SIZE,
+            connect_timeout=settings.OMDB_CONNECT_TIMEOUT,
+            read_timeout=settings.OMDB_READ_TIMEOUT,
+            max_retries=settings.OMDB_MAX_RETRIES,
+            backoff_factor=settings.OMDB_BACKOFF_FACTOR,
+            circuit_breaker=services.get_client().circuit_breaker
+        )
+
+    async def get(self, **params):
+        """Return decoded OMDb response for the given query parameters."""
+        with instrumentation.upstream_request():
+            return await self._get(**params)
+
+    async def _get(self, **params):
+        if not self.circuit_breaker.allow_request():
+            raise OmdbApiUnavailable('Omdb Api is unavailable.')
+        params = dict(apikey=self.api_key, **params)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff_factor * 2 ** (attempt - 1))
+            try:
+                async with self.session.get(self.url, params=params) as response:
+                    if response.status in services.RETRY_STATUSES:
+                        continue
+                    try:
+                        content = await response.json(content_type=None)
+                    except ValueError:
+                        content = None
+                    if response.status in services.REJECTED_STATUSES:
+                        self.circuit_breaker.record_failure()
+                        raise services.rejected(content)
+                    self.circuit_breaker.record_success()
+                    if content is None:
+                        raise OmdbApiUnavailable(
+                            'Omdb Api returned invalid response.'
+                        )
+                    return content
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                continue
+        self.circuit_breaker.record_failure()
+        raise OmdbApiUnavailable('Omdb Api is unavailable.')
+
+    async def close(self):
+        await self.session.close()
+
+
+_clients = {}
+
+
+def get_async_client():
+    """Return the client of the running event loop, sessions are per loop."""
+    loop = asyncio.get_event_loop()
+    if loop not in _clients:
+        _clients[loop] = AsyncOmdbClient.from_settings()
+    return _clients[loop]
+
+
+async def close_async_client():
+    client = _clients.pop(asyncio.get_event_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+async def fetch_movie_omdapi_async(title=None, imdb_id=None, refresh=False):
+    """Asyncio counterpart of services.fetch_movie_omdapi."""
+    params, key = services.omdb_lookup(title, imdb_id)
+    if not refresh:
+        data = services.get_cached_movie(key)
+        if data is not None:
+            return data
+    try:
+        data = services.parse_movie(await get_async_client().get(**params))
+    except OmdbApiUnavailable:
+        raise
+    except OmdbApiException as exception:
+        services.cache_missing_movie(key, exception)
+        raise
+    services.cache_movie(key, data)
+    return deepcopy(data)
+
+
+async def _fetch_many(queries, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(query):
+        async with semaphore:
+            try:
+                if services.IMDB_ID_RE.match(query):
+                    data = await fetch_movie_omdapi_async(imdb_id=query)
+                else:
+                    data = await fetch_movie_omdapi_async(query)
+            except OmdbApiException as exception:
+                return None, str(exception)
+            except ValidationError as exception:
+                return None, exception.detail
+            return data, None
+
+    try:
+        return await asyncio.gather(*(fetch(query) for query in queries))
+    finally:
+        await close_async_client()
+
+
+def fetch_many(queries, concurrency):
+    """Fetch titles or imdbIDs concurrently in a private event loop.
+
+    Returns (data, error) pairs in the order of queries.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_fetch_many(queries, concurrency))
+    finally:
+        loop.close()
@@ -0,0 +1,96 @@
+"""PostgreSQL backend with connection health checks and pooling.
+
+With CONN_HEALTH_CHECKS a persistent connection is checked before its
+first use in every request and replaced when it went away. POOL, a dict
+of SIZE, OVERFLOW, TIMEOUT and RECYCLE, makes the threads of a process
+share connections of a ConnectionPool instead of opening their own.
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.base.base import NO_DB_ALIAS
+
+from movies.db.creation import DatabaseCreation
+from movies.db.pool import ConnectionPool, get_pool
+
+
+Database = base.Database
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    creation_class = DatabaseCreation
+    health_check_done = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        check = None
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            check = is_usable
+        return get_pool(self.alias, conn_params, lambda: ConnectionPool(
+            lambda: Database.connect(**conn_params),
+            size=options.get('SIZE', 5),
+            overflow=options.get('OVERFLOW', 5),
+            timeout=options.get('TIMEOUT', 10),
+            recycle=options.get('RECYCLE'),
+            check=check
+        ))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+        connection = self.pool.acquire()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps using a connection closed in a transaction
+                # until rollback, it must not go to another thread.
+                self.connection.close()
+            self.pool.release(self.connection)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        if (
+                self.connection is not None and
+                not self.health_check_done and
+                self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            # Inside a transaction a lost connection has to error out.
+            if not self.in_atomic_block and not is_usable(self.connection):
+                self.close()
+            self.health_check_done = True
+        return super()._cursor(name)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
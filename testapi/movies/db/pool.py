@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import Counter, deque
+
+from psycopg2 import OperationalError, extensions
+
+
+class PoolTimeout(OperationalError):
+
+    """No connection became available within the acquisition timeout."""
+
+
+class ConnectionPool:
+
+    """Bounded pool of psycopg2 connections shared by the threads.
+
+    Keeps up to size idle connections. When all are in use up to
+    overflow extra connections are opened, they are closed on release.
+    acquire() waits up to timeout seconds for a free slot. Connections
+    older than recycle seconds are closed instead of reused, check is
+    called on idle connections before handing them out again.
+    """
+
+    def __init__(
+            self, connect, size=5, overflow=5, timeout=10, recycle=None,
+            check=None):
+        self.connect = connect
+        self.size = size
+        self.overflow = overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.check = check
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._created = {}
+        self._open = 0
+        self._waiting = 0
+        self._counts = Counter()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection = self._checkout(deadline)
+            if connection is None:
+                break
+            # Checked without holding the lock, it runs a query.
+            if self.check is None or self.check(connection):
+                with self._condition:
+                    self._counts['reused'] += 1
+                return connection
+            with self._condition:
+                self._counts['discarded'] += 1
+                self._discard(connection)
+                self._condition.notify()
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created[connection] = time.monotonic()
+            self._counts['connected'] += 1
+        return connection
+
+    def _checkout(self, deadline):
+        """Return an idle connection or None after reserving a new one."""
+        with self._condition:
+            while True:
+                # Most recently used first, the surplus ages out.
+                while self._idle:
+                    connection = self._idle.pop()
+                    if not self._is_stale(connection):
+                        return connection
+                    self._counts['recycled'] += 1
+                    self._discard(connection)
+                if self._open < self.size + self.overflow:
+                    self._open += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counts['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No database connection available after '
+                        f'{self.timeout}s, {self._open} are in use.'
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def release(self, connection):
+        """Return connection to the pool, rolling back open transactions."""
+        if not connection.closed:
+            try:
+                status = connection.get_transaction_status()
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception:
+                connection.close()
+        with self._condition:
+            if connection.closed:
+                self._counts['discarded'] += 1
+                self._discard(connection)
+            elif self._is_stale(connection):
+                self._counts['recycled'] += 1
+                self._discard(connection)
+            elif len(self._idle) >= self.size:
+                self._discard(connection)
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    def _is_stale(self, connection):
+        return (
+            self.recycle is not None and
+            time.monotonic() - self._created[connection] > self.recycle
+        )
+
+    def _discard(self, connection):
+        # Called with the condition held.
+        del self._created[connection]
+        self._open -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close the idle connections."""
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self.size,
+                'overflow': self.overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'waiting': self._waiting,
+                'connected': self._counts['connected'],
+                'reused': self._counts['reused'],
+                'recycled': self._counts['recycled'],
+                'discarded': self._counts['discarded'],
+                'timeouts': self._counts['timeouts'],
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, params, factory):
+    """Return the pool of alias, created by factory for new params."""
+    with _pools_lock:
+        pool, pool_params = _pools.get(alias, (None, None))
+        if pool_params != params:
+            if pool is not None:
+                pool.close()
+            pool = factory()
+            _pools[alias] = pool, params
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        pools = [pool for pool, _ in _pools.values()]
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """Stats of the connection pools of this process by database alias."""
+    with _pools_lock:
+        pools = {alias: pool for alias, (pool, _) in _pools.items()}
+    return {alias: pool.stats() for alias, pool in pools.items()}
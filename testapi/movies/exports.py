@@ -0,0 +1,153 @@
+"""Streaming exports of the movie and comment tables as NDJSON or CSV.
+
+Rows are read with a server side cursor and rendered chunk by chunk, so
+memory use does not grow with the size of the export.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from movies import filters, serializers
+from movies.fast_serializers import get_columns, serialize_rows
+from movies.models import Comment, Movie
+
+
+# Ordered by the incremental cutoff column, a consumer can remember the
+# last value it received.
+EXPORTS = {
+    'movies': (
+        Movie.objects.order_by('updated_at', 'pk'),
+        serializers.MovieExportSerializer, filters.MovieExportFilterSet
+    ),
+    'comments': (
+        Comment.objects.order_by('updated_at', 'pk'),
+        serializers.CommentExportSerializer, filters.CommentExportFilterSet
+    ),
+}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_rows(name, params, chunk_size=None):
+    """Return field names and chunks of representations of an export.
+
+    params are filters of the export filterset, invalid ones raise
+    ValidationError right away.
+    """
+    queryset, serializer_class, filterset_class = EXPORTS[name]
+    filterset = filterset_class(params, queryset=queryset.all())
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    columns = get_columns(serializer_class)
+    rows = filterset.qs.values(
+        *(source for _, source, _ in columns)
+    ).iterator(chunk_size=chunk_size)
+    chunks = (
+        serialize_rows(columns, chunk) for chunk in _chunks(rows, chunk_size)
+    )
+    return [field_name for field_name, _, _ in columns], chunks
+
+
+def _dumps(value):
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+
+
+def render_ndjson(names, chunks):
+    for chunk in chunks:
+        yield ''.join(_dumps(item) + '\n' for item in chunk)
+
+
+class _Echo:
+
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    return value
+
+
+def render_csv(names, chunks):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(names)
+    for chunk in chunks:
+        yield ''.join(
+            writer.writerow([_csv_value(item[name]) for name in names])
+            for item in chunk
+        )
+
+
+FORMATS = {
+    'ndjson': (render_ndjson, 'application/x-ndjson'),
+    'csv': (render_csv, 'text/csv'),
+}
+
+
+def export(name, params, export_format, chunk_size=None):
+    """Return an iterator of text chunks of the export in a format."""
+    render, _ = FORMATS[export_format]
+    return render(*get_rows(name, params, chunk_size))
+
+
+def streaming_response(name, params, export_format):
+    _, content_type = FORMATS[export_format]
+    response = StreamingHttpResponse(
+        export(name, params, export_format),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{export_format}"'
+    )
+    return response
+
+
+class NDJSONRenderer(BaseRenderer):
+
+    """Select NDJSON exports, renders error responses as one line."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (_dumps(data) + '\n').encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+
+    """Select CSV exports, renders error responses as field,error rows."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        writer = csv.writer(_Echo())
+        lines = [writer.writerow(['field', 'error'])]
+        for field_name, errors in data.items():
+            if not isinstance(errors, list):
+                errors = [errors]
+            lines.extend(
+                writer.writerow([field_name, error]) for error in errors
+            )
+        return ''.join(lines).encode(self.charset)
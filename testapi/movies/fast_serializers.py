@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields, relations
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from movies.instrumentation import timer
+from movies.serializers import PreloadedPrimaryKeyRelatedField
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        value = field.enforce_timezone(value).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _list_converter(field):
+    convert_item = _converter(field.child)
+    return lambda value: [
+        None if item is None else convert_item(item) for item in value
+    ]
+
+
+def _json_converter(field):
+    if field.binary:
+        return field.to_representation
+    return lambda value: value
+
+
+def _related_converter(field):
+    if field.pk_field is not None:
+        return field.to_representation
+    return lambda value: value
+
+
+_converter_factories = {
+    fields.CharField: lambda field: str,
+    fields.IntegerField: lambda field: int,
+    fields.DateTimeField: _datetime_converter,
+    fields.DateField: _date_converter,
+    fields.ListField: _list_converter,
+    fields.JSONField: _json_converter,
+    relations.PrimaryKeyRelatedField: _related_converter,
+    PreloadedPrimaryKeyRelatedField: _related_converter,
+}
+
+
+def _converter(field):
+    # Exact type match only, subclasses may override to_representation.
+    factory = _converter_factories.get(type(field))
+    if factory is None:
+        return field.to_representation
+    return factory(field)
+
+
+def _compile(serializer):
+    model = serializer.Meta.model
+    columns = []
+    for field in serializer._readable_fields:
+        if len(field.source_attrs) != 1:
+            return None
+        try:
+            model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        columns.append((field.field_name, field.source, _converter(field)))
+    return columns
+
+
+# Field selections come from the query string, only the most recently
+# used ones are kept.
+@lru_cache(maxsize=256)
+def _get_compiled(serializer_class, fields):
+    kwargs = {} if fields is None else {'fields': list(fields)}
+    return _compile(serializer_class(**kwargs))
+
+
+def get_columns(serializer_class, fields=None):
+    """Return (name, source, converter) for every field of the serializer.
+
+    Columns are compiled once per serializer class and field selection.
+    Returns None if some field is not a plain model column and so cannot
+    be rendered from ``.values()`` rows.
+    """
+    return _get_compiled(
+        serializer_class, None if fields is None else tuple(fields)
+    )
+
+
+def serialize_rows(columns, rows):
+    """Render ``.values()`` rows the same way the serializer would."""
+    result = []
+    for row in rows:
+        item = OrderedDict()
+        for name, source, convert in columns:
+            value = row[source]
+            item[name] = None if value is None else convert(value)
+        result.append(item)
+    return result
+
+
+class FastListMixin:
+
+    """Render list responses from ``.values()`` rows when enabled.
+
+    Skips model instantiation and per-field serializer machinery, the
+    output is the same as the one of the regular serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+        columns = get_columns(
+            self.get_serializer_class(), getattr(self, 'list_fields', None)
+        )
+        if columns is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [
+            name.lstrip('-') for name in queryset.query.order_by
+            if isinstance(name, str)
+        ]
+        # Keyset pagination also reads the pk, its ordering tiebreaker.
+        sources = list(dict.fromkeys(
+            [source for _, source, _ in columns] + ordering + ['pk']
+        ))
+        rows = queryset.values(*sources)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            with timer('serialization'):
+                data = serialize_rows(columns, page)
+            return self.get_paginated_response(data)
+        with timer('serialization'):
+            return Response(serialize_rows(columns, rows))
+
+    def use_fast_list(self):
+        return settings.FAST_LIST_SERIALIZATION
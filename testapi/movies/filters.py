@@ -0,0 +1,157 @@
+import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from django_filters.fields import IsoDateTimeField
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from movies.models import Comment, Credit, Movie
+
+
+DATETIME_INPUT_FORMATS = (IsoDateTimeField.ISO_8601, '%Y-%m-%d')
+
+
+class CharArrayFilter(
+        django_filters.BaseCSVFilter, django_filters.CharFilter):
+
+    """Filter ArrayField with a comma separated list of values."""
+
+
+class MovieFilterSet(django_filters.FilterSet):
+
+    """Exact, range and array filters for movies.
+
+    ``genre=Action,Sci-Fi`` matches movies having all the given genres,
+    ``genre__overlap=Action,Sci-Fi`` movies having any of them. Rating,
+    runtime and box office ranges use the typed columns, ``actor``,
+    ``director`` and ``writer`` the credits.
+    """
+
+    genre = CharArrayFilter(lookup_expr='contains')
+    genre__overlap = CharArrayFilter(field_name='genre', lookup_expr='overlap')
+    language = CharArrayFilter(lookup_expr='contains')
+    language__overlap = CharArrayFilter(
+        field_name='language', lookup_expr='overlap'
+    )
+    country = CharArrayFilter(lookup_expr='contains')
+    country__overlap = CharArrayFilter(
+        field_name='country', lookup_expr='overlap'
+    )
+    imdb_rating__gte = django_filters.NumberFilter(
+        field_name='imdb_rating_value', lookup_expr='gte'
+    )
+    imdb_rating__lte = django_filters.NumberFilter(
+        field_name='imdb_rating_value', lookup_expr='lte'
+    )
+    runtime__gte = django_filters.NumberFilter(
+        field_name='runtime_minutes', lookup_expr='gte'
+    )
+    runtime__lte = django_filters.NumberFilter(
+        field_name='runtime_minutes', lookup_expr='lte'
+    )
+    box_office__gte = django_filters.NumberFilter(
+        field_name='box_office_amount', lookup_expr='gte'
+    )
+    box_office__lte = django_filters.NumberFilter(
+        field_name='box_office_amount', lookup_expr='lte'
+    )
+    actor = django_filters.CharFilter(method='filter_credit')
+    director = django_filters.CharFilter(method='filter_credit')
+    writer = django_filters.CharFilter(method='filter_credit')
+
+    def filter_credit(self, queryset, name, value):
+        return queryset.filter(pk__in=Credit.objects.filter(
+            role=name, person__name=value
+        ).values('movie_id'))
+
+    class Meta:
+        model = Movie
+        fields = {
+            'title': ['exact'],
+            'imdb_id': ['exact'],
+            'year': ['exact', 'gte', 'lte'],
+            'metascore': ['gte', 'lte'],
+            'imdb_votes': ['gte', 'lte']
+        }
+
+
+class MovieSearchFilter(BaseFilterBackend):
+
+    """Full text search over title, people and plot ranked by relevance.
+
+    Results are ordered by rank unless an explicit ordering was requested.
+    """
+
+    search_param = 'search'
+    config = 'english'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        query = SearchQuery(terms, config=self.config)
+        queryset = queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).filter(search_vector=query)
+        if 'ordering' in request.query_params:
+            return queryset
+        return queryset.order_by('-search_rank', 'pk')
+
+
+class CommentFilterSet(django_filters.FilterSet):
+
+    """Comments of a movie added in [created_after, created_before)."""
+
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name='created_at', lookup_expr='gte',
+        input_formats=DATETIME_INPUT_FORMATS
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name='created_at', lookup_expr='lt',
+        input_formats=DATETIME_INPUT_FORMATS
+    )
+
+    class Meta:
+        model = Comment
+        fields = ('movie',)
+
+
+class MovieExportFilterSet(MovieFilterSet):
+
+    """Movie filters plus the cutoff of incremental exports."""
+
+    modified_since = django_filters.IsoDateTimeFilter(
+        field_name='updated_at', lookup_expr='gte',
+        input_formats=DATETIME_INPUT_FORMATS
+    )
+
+
+class CommentExportFilterSet(CommentFilterSet):
+
+    """Comment filters plus the cutoff of incremental exports."""
+
+    modified_since = django_filters.IsoDateTimeFilter(
+        field_name='updated_at', lookup_expr='gte',
+        input_formats=DATETIME_INPUT_FORMATS
+    )
+
+
+class MovieOrderingFilter(OrderingFilter):
+
+    """Order rating, runtime and box office by their typed columns."""
+
+    typed_fields = {
+        'imdb_rating': 'imdb_rating_value',
+        'runtime': 'runtime_minutes',
+        'box_office': 'box_office_amount'
+    }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [self.get_typed_field(term) for term in ordering]
+
+    def get_typed_field(self, term):
+        prefix = '-' if term.startswith('-') else ''
+        name = term.lstrip('-')
+        return prefix + self.typed_fields.get(name, name)
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from movies.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RequestStats:
+
+    """Costs recorded while handling a single request."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.durations = Counter()
+        self.upstream_requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def add_query(self, sql, duration):
+        with self._lock:
+            self.queries[sql] += 1
+            self.durations['db'] += duration
+
+    def add_upstream_request(self, duration):
+        with self._lock:
+            self.upstream_requests += 1
+            self.durations['upstream'] += duration
+
+    def add(self, name, duration):
+        with self._lock:
+            self.durations[name] += duration
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def activate(stats):
+    previous = current()
+    _local.stats = stats
+    try:
+        yield stats
+    finally:
+        _local.stats = previous
+
+
+def bind(function):
+    """Return function recording into the current stats from any thread."""
+    stats = current()
+
+    def wrapper(*args, **kwargs):
+        with activate(stats):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = current()
+        if stats is not None:
+            stats.add(name, time.perf_counter() - start)
+
+
+@contextmanager
+def upstream_request():
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = current()
+        if stats is not None:
+            stats.add_upstream_request(time.perf_counter() - start)
+
+
+def _query_recorder(stats):
+    def record(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.add_query(sql, time.perf_counter() - start)
+    return record
+
+
+@contextmanager
+def collect():
+    """Record queries on all connections and timers of this thread."""
+    stats = RequestStats()
+    with ExitStack() as stack:
+        stack.enter_context(activate(stats))
+        record = _query_recorder(stats)
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record))
+        yield stats
+
+
+class TimedSerializerMixin:
+
+    """Record the time spent building serializer data."""
+
+    @property
+    def data(self):
+        with timer('serialization'):
+            return super().data
+
+
+def server_timing(stats, total):
+    return ', '.join((
+        'db;dur={:.1f};desc="{} queries"'.format(
+            stats.durations['db'] * 1000, stats.query_count
+        ),
+        'upstream;dur={:.1f};desc="{} requests"'.format(
+            stats.durations['upstream'] * 1000, stats.upstream_requests
+        ),
+        'serialization;dur={:.1f}'.format(
+            stats.durations['serialization'] * 1000
+        ),
+        'total;dur={:.1f}'.format(total * 1000)
+    ))
+
+
+def record_request(view, method, status, stats, total):
+    """Add request costs to the metrics, warn about excessive queries."""
+    labels = {'view': view}
+    registry.inc(
+        'movies_http_requests_total',
+        {'view': view, 'method': method, 'status': status}
+    )
+    registry.observe(
+        'movies_http_request_duration_seconds', total,
+        {'view': view, 'method': method}
+    )
+    registry.inc('movies_db_queries_total', labels, stats.query_count)
+    registry.inc(
+        'movies_db_duration_seconds_total', labels, stats.durations['db']
+    )
+    registry.inc(
+        'movies_upstream_requests_total', labels, stats.upstream_requests
+    )
+    registry.inc(
+        'movies_upstream_duration_seconds_total', labels,
+        stats.durations['upstream']
+    )
+    registry.inc(
+        'movies_serialization_duration_seconds_total', labels,
+        stats.durations['serialization']
+    )
+
+    budget = settings.INSTRUMENTATION_QUERY_BUDGETS.get(
+        view, settings.INSTRUMENTATION_QUERY_BUDGET
+    )
+    if budget is not None and stats.query_count > budget:
+        registry.inc('movies_query_budget_exceeded_total', labels)
+        logger.warning(
+            '%s %s ran %d queries, the budget is %d.',
+            method, view, stats.query_count, budget
+        )
+    threshold = settings.INSTRUMENTATION_REPEATED_QUERY_THRESHOLD
+    repeated = [
+        (sql, count) for sql, count in stats.queries.most_common()
+        if count >= threshold
+    ]
+    if repeated:
+        registry.inc('movies_repeated_queries_total', labels)
+    for sql, count in repeated:
+        logger.warning(
+            '%s %s ran the same query %d times, possible N+1: %s',
+            method, view, count, sql[:200]
+        )
@@ -0,0 +1,131 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+
+from movies import OmdbApiException, services
+from movies.models import IngestionJob
+
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseBackend:
+
+    """Jobs stay in the database until a worker claims them.
+
+    Workers are started with ``manage.py run_ingestion_worker``.
+    """
+
+    def enqueue(self, job_id):
+        pass
+
+
+class ThreadBackend:
+
+    """Process every job in a new thread of the current process."""
+
+    def __init__(self):
+        self.threads = []
+
+    def enqueue(self, job_id):
+        thread = threading.Thread(target=self._run, args=(job_id,))
+        self.threads.append(thread)
+        thread.start()
+
+    def _run(self, job_id):
+        try:
+            process_job(job_id)
+        finally:
+            connection.close()
+
+    def join(self):
+        while self.threads:
+            self.threads.pop().join()
+
+
+_backends = {}
+
+
+def get_backend():
+    path = settings.MOVIES_INGESTION_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def enqueue(title):
+    """Return (job, created), pending jobs for the same title are reused."""
+    normalized_title = services.normalize_title(title)
+    active = IngestionJob.objects.filter(
+        normalized_title=normalized_title,
+        status__in=IngestionJob.ACTIVE_STATUSES
+    )
+    job = active.first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            job = IngestionJob.objects.create(
+                title=title, normalized_title=normalized_title
+            )
+    except IntegrityError:
+        # Unique index on active jobs, a concurrent request won.
+        return active.get(), False
+    transaction.on_commit(lambda: get_backend().enqueue(job.pk))
+    return job, True
+
+
+def _claim(jobs):
+    with transaction.atomic():
+        job = jobs.select_for_update(skip_locked=True).filter(
+            status=IngestionJob.PENDING
+        ).order_by('created_at').first()
+        if job is not None:
+            job.status = IngestionJob.RUNNING
+            job.save(update_fields=['status', 'updated_at'])
+        return job
+
+
+def claim_next_job():
+    return _claim(IngestionJob.objects.all())
+
+
+def requeue_stale_jobs():
+    """Return jobs of workers which died while running them to the queue."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.MOVIES_INGESTION_JOB_TIMEOUT
+    )
+    return IngestionJob.objects.filter(
+        status=IngestionJob.RUNNING, updated_at__lt=deadline
+    ).update(status=IngestionJob.PENDING, updated_at=timezone.now())
+
+
+def process_job(job_id):
+    """Claim and run a pending job, do nothing if it was claimed already."""
+    job = _claim(IngestionJob.objects.filter(pk=job_id))
+    if job is not None:
+        run_job(job)
+
+
+def run_job(job):
+    try:
+        job.movie, _ = services.ingest_movie(job.title)
+    except OmdbApiException as exception:
+        job.status = IngestionJob.FAILED
+        job.error = str(exception)
+    except ValidationError as exception:
+        job.status = IngestionJob.FAILED
+        job.error = str(exception.detail)
+    except Exception:
+        logger.exception('Ingestion job %s failed.', job.pk)
+        job.status = IngestionJob.FAILED
+        job.error = 'Internal error.'
+    else:
+        job.status = IngestionJob.DONE
+    job.save(update_fields=['status', 'movie', 'error', 'updated_at'])
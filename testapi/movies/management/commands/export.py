@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from movies import exports
+
+
+class Command(BaseCommand):
+
+    help = 'Stream all movies or comments as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(exports.EXPORTS))
+        parser.add_argument(
+            '--format', choices=sorted(exports.FORMATS), default='ndjson'
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='File to write, "-" (default) writes to stdout.'
+        )
+        parser.add_argument(
+            '--modified-since',
+            help='Only rows changed at or after this ISO 8601 time.'
+        )
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='NAME=VALUE',
+            help='Filter of the list endpoint, e.g. genre=Drama.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE,
+            help='Number of rows fetched per round trip.'
+        )
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'Filter "{item}" is not NAME=VALUE.')
+            params.appendlist(name, value)
+        if options['modified_since']:
+            params['modified_since'] = options['modified_since']
+        try:
+            chunks = exports.export(
+                options['name'], params, options['format'],
+                chunk_size=options['chunk_size']
+            )
+        except ValidationError as exception:
+            raise CommandError(f'Invalid filters: {exception.detail}')
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='') as file:
+            for chunk in chunks:
+                file.write(chunk)
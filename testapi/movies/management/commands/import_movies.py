@@ -0,0 +1,53 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from movies import services
+
+
+class Command(BaseCommand):
+
+    help = 'Import movies from OMDb, one title or imdbID per line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file', nargs='?', default='-',
+            help='File with titles, "-" (default) reads from stdin.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=settings.OMDB_IMPORT_CONCURRENCY,
+            help='Number of concurrent OMDb requests.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.MOVIES_IMPORT_CHUNK_SIZE,
+            help='Number of rows inserted per query.'
+        )
+
+    def handle(self, *args, **options):
+        if options['file'] == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(options['file']) as file:
+                lines = file.read().splitlines()
+        results = services.import_movies(
+            lines,
+            concurrency=options['concurrency'],
+            chunk_size=options['chunk_size']
+        )
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            if result['status'] == 'error':
+                self.stderr.write(f'{result["query"]}: {result["error"]}')
+            else:
+                self.stdout.write(
+                    f'{result["query"]}: {result["status"]} '
+                    f'({result["imdb_id"]})'
+                )
+        summary = ', '.join(
+            f'{count} {status}' for status, count in sorted(counts.items())
+        )
+        self.stdout.write(self.style.SUCCESS(f'Done: {summary or "nothing"}.'))
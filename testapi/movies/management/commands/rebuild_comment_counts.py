@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from movies import rollups
+
+
+class Command(BaseCommand):
+
+    help = 'Recompute daily comment counts used by the top movies ranking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows inserted per query.'
+        )
+
+    def handle(self, *args, **options):
+        rollups.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Comment counts rebuilt.'))
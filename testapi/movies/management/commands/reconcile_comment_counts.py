@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from movies import rollups
+
+
+class Command(BaseCommand):
+
+    help = 'Recompute the comment count stored on every movie.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of movies updated per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        corrected = rollups.reconcile_movie_comment_counts(
+            chunk_size=options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Comment counts of {corrected} movies corrected.'
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from movies import jobs
+
+
+class Command(BaseCommand):
+
+    help = 'Process background movie ingestion jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when there are no pending jobs.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Like between requests, replace expired or broken
+            # connections and return pooled ones.
+            close_old_connections()
+            jobs.requeue_stale_jobs()
+            job = jobs.claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(settings.MOVIES_INGESTION_POLL_INTERVAL)
+                continue
+            jobs.run_job(job)
+            self.stdout.write(f'{job.title}: {job.status}')
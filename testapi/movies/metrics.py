@@ -0,0 +1,187 @@
+import threading
+from bisect import bisect_left
+
+from movies.db.pool import pool_stats
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace(
+            '"', '\\"'
+        ).replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+
+    """In-process counters and histograms in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._buckets = {}
+        self._values = {}
+
+    def counter(self, name, help_text):
+        self._declare(name, 'counter', help_text)
+
+    def gauge(self, name, help_text):
+        self._declare(name, 'gauge', help_text)
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS):
+        self._declare(name, 'histogram', help_text)
+        self._buckets[name] = tuple(buckets)
+
+    def _declare(self, name, metric_type, help_text):
+        self._help[name] = help_text
+        self._types[name] = metric_type
+        self._values.setdefault(name, {})
+
+    def inc(self, name, labels=(), value=1):
+        labels = tuple(sorted(labels.items())) if labels else ()
+        with self._lock:
+            values = self._values[name]
+            values[labels] = values.get(labels, 0) + value
+
+    def set(self, name, value, labels=()):
+        """Set a gauge, or a counter kept elsewhere, to value."""
+        labels = tuple(sorted(labels.items())) if labels else ()
+        with self._lock:
+            self._values[name][labels] = value
+
+    def observe(self, name, value, labels=()):
+        labels = tuple(sorted(labels.items())) if labels else ()
+        buckets = self._buckets[name]
+        with self._lock:
+            values = self._values[name]
+            if labels not in values:
+                values[labels] = [[0] * len(buckets), 0, 0.0]
+            counts, _, _ = values[labels]
+            index = bisect_left(buckets, value)
+            if index < len(buckets):
+                counts[index] += 1
+            values[labels][1] += 1
+            values[labels][2] += value
+
+    def reset(self):
+        with self._lock:
+            for values in self._values.values():
+                values.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, values in self._values.items():
+                lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} {self._types[name]}')
+                for labels, value in sorted(values.items()):
+                    if self._types[name] != 'histogram':
+                        lines.append(
+                            f'{name}{_format_labels(labels)} '
+                            f'{_format_value(value)}'
+                        )
+                        continue
+                    lines.extend(self._render_histogram(name, labels, value))
+        return '\n'.join(lines) + '\n'
+
+    def _render_histogram(self, name, labels, value):
+        counts, count, total = value
+        cumulative = 0
+        for bound, bucket_count in zip(self._buckets[name], counts):
+            cumulative += bucket_count
+            bucket_labels = labels + (('le', _format_value(float(bound))),)
+            yield f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}'
+        inf_labels = labels + (('le', '+Inf'),)
+        yield f'{name}_bucket{_format_labels(inf_labels)} {count}'
+        yield f'{name}_sum{_format_labels(labels)} {_format_value(total)}'
+        yield f'{name}_count{_format_labels(labels)} {count}'
+
+
+registry = Registry()
+registry.counter(
+    'movies_http_requests_total', 'Requests by view, method and status.'
+)
+registry.histogram(
+    'movies_http_request_duration_seconds', 'Time spent handling requests.'
+)
+registry.counter('movies_db_queries_total', 'Database queries run.')
+registry.counter(
+    'movies_db_duration_seconds_total', 'Time spent in database queries.'
+)
+registry.counter(
+    'movies_upstream_requests_total', 'Requests sent to the OMDb api.'
+)
+registry.counter(
+    'movies_upstream_duration_seconds_total',
+    'Time spent waiting for the OMDb api.'
+)
+registry.counter(
+    'movies_serialization_duration_seconds_total',
+    'Time spent serializing and rendering responses.'
+)
+registry.counter(
+    'movies_query_budget_exceeded_total',
+    'Requests which ran more queries than their budget.'
+)
+registry.counter(
+    'movies_repeated_queries_total',
+    'Requests repeating the same query, likely N+1 access.'
+)
+registry.gauge(
+    'movies_db_pool_connections',
+    'Open connections of the database connection pool by state.'
+)
+registry.gauge(
+    'movies_db_pool_waiting', 'Threads waiting for a pooled connection.'
+)
+registry.counter(
+    'movies_db_pool_acquisitions_total',
+    'Pooled connections handed out by whether they were reused.'
+)
+registry.counter(
+    'movies_db_pool_closed_total',
+    'Pooled connections closed as stale or broken.'
+)
+registry.counter(
+    'movies_db_pool_timeouts_total',
+    'Requests for a pooled connection which timed out.'
+)
+
+
+def record_pool_stats():
+    """Copy the database connection pool stats into the registry."""
+    for alias, stats in pool_stats().items():
+        labels = {'alias': alias}
+        for state in ('idle', 'in_use'):
+            registry.set(
+                'movies_db_pool_connections', stats[state],
+                {'alias': alias, 'state': state}
+            )
+        registry.set('movies_db_pool_waiting', stats['waiting'], labels)
+        for result in ('connected', 'reused'):
+            registry.set(
+                'movies_db_pool_acquisitions_total', stats[result],
+                {'alias': alias, 'result': result}
+            )
+        for reason in ('recycled', 'discarded'):
+            registry.set(
+                'movies_db_pool_closed_total', stats[reason],
+                {'alias': alias, 'reason': reason}
+            )
+        registry.set(
+            'movies_db_pool_timeouts_total', stats['timeouts'], labels
+        )
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+
+from movies import instrumentation, routers
+
+
+class InstrumentationMiddleware:
+
+    """Record query count, database, upstream and serialization time.
+
+    Costs are sent in the Server-Timing header and added to the metrics
+    registry per view. Should come last in MIDDLEWARE, so that rendering
+    the response is counted as serialization.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with instrumentation.collect() as stats:
+            response = self.get_response(request)
+            end = time.perf_counter()
+            render_start = getattr(request, '_render_start', None)
+            if render_start is not None:
+                stats.add('serialization', end - render_start)
+        total = end - start
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        response['Server-Timing'] = instrumentation.server_timing(
+            stats, total
+        )
+        instrumentation.record_request(
+            view, request.method, response.status_code, stats, total
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        request._render_start = time.perf_counter()
+        return response
+
+
+class ReplicaPinningMiddleware:
+
+    """Keep reads of a client on the primary right after it wrote.
+
+    A response to a request which wrote sets a cookie for
+    REPLICA_PIN_SECONDS, requests carrying it do not read from replicas
+    and so see the client's own writes despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.pin(settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        finally:
+            routers.pin(False)
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True
+            )
+        return response
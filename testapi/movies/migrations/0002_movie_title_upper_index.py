@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX movies_movie_title_upper_idx '
+            'ON movies_movie (UPPER(title));',
+            'DROP INDEX movies_movie_title_upper_idx;'
+        ),
+    ]
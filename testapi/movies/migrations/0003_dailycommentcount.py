@@ -0,0 +1,49 @@
+# Generated by Django 2.1.2 on 2026-10-18 20:30
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def populate_daily_comment_counts(apps, schema_editor):
+    Comment = apps.get_model('movies', 'Comment')
+    DailyCommentCount = apps.get_model('movies', 'DailyCommentCount')
+    rows = Comment.objects.annotate(
+        day=TruncDate('created_at')
+    ).values('movie_id', 'day').annotate(
+        comment_count=Count('id')
+    ).order_by()
+    DailyCommentCount.objects.bulk_create(
+        DailyCommentCount(**row) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_movie_title_upper_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCommentCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_comment_counts', to='movies.Movie')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dailycommentcount',
+            index=models.Index(fields=['day', 'movie'], name='movies_dail_day_b0d8ee_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailycommentcount',
+            unique_together={('movie', 'day')},
+        ),
+        migrations.RunPython(
+            populate_daily_comment_counts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.1.2 on 2026-10-18 20:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_dailycommentcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('normalized_title', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=15)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('movie', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='movies.Movie')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ingestionjob',
+            index=models.Index(fields=['status', 'created_at'], name='movies_inge_status_25f70e_idx'),
+        ),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX movies_ingestionjob_active_title_uniq "
+            "ON movies_ingestionjob (normalized_title) "
+            "WHERE status IN ('pending', 'running');",
+            'DROP INDEX movies_ingestionjob_active_title_uniq;'
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.1.2 on 2026-10-18 20:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION movies_movie_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english',
+            coalesce(NEW.director, '') || ' ' ||
+            coalesce(NEW.writer, '') || ' ' ||
+            coalesce(NEW.actors, '')
+        ), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.plot, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER movies_movie_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, director, writer, actors, plot
+    ON movies_movie
+    FOR EACH ROW EXECUTE PROCEDURE movies_movie_search_vector_update();
+
+UPDATE movies_movie SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER movies_movie_search_vector_trigger ON movies_movie;
+DROP FUNCTION movies_movie_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='movies_movi_search__eaebc6_gin'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+    ]
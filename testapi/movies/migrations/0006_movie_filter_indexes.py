@@ -0,0 +1,38 @@
+# Generated by Django 2.1.2 on 2026-10-18 20:47
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_movie_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['genre'], name='movies_movi_genre_5928d8_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['language'], name='movies_movi_languag_6ff5d7_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['country'], name='movies_movi_country_72017c_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['year'], name='movies_movi_year_82d175_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['metascore'], name='movies_movi_metasco_a7c695_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['imdb_votes'], name='movies_movi_imdb_vo_9e0c36_idx'),
+        ),
+    ]
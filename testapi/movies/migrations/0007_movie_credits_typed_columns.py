@@ -0,0 +1,74 @@
+# Generated by Django 2.1.2 on 2026-10-18 20:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_movie_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Credit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('director', 'Director'), ('writer', 'Writer'), ('actor', 'Actor')], max_length=15)),
+                ('position', models.PositiveSmallIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='box_office_amount',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='imdb_rating_value',
+            field=models.DecimalField(decimal_places=1, editable=False, max_digits=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='runtime_minutes',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['imdb_rating_value'], name='movies_movi_imdb_ra_b31a3d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['runtime_minutes'], name='movies_movi_runtime_1c4e21_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['box_office_amount'], name='movies_movi_box_off_85ea53_idx'),
+        ),
+        migrations.AddField(
+            model_name='credit',
+            name='movie',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='movies.Movie'),
+        ),
+        migrations.AddField(
+            model_name='credit',
+            name='person',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credits', to='movies.Person'),
+        ),
+        migrations.AddIndex(
+            model_name='credit',
+            index=models.Index(fields=['person', 'role'], name='movies_cred_person__dee97d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='credit',
+            unique_together={('movie', 'role', 'person')},
+        ),
+    ]
@@ -0,0 +1,115 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, transaction
+
+
+CHUNK_SIZE = 1000
+
+# Copies of the movies.normalization helpers as of this migration, so
+# later changes to them do not change what it does.
+RUNTIME_RE = re.compile(r'^\s*(\d+)\s*min')
+PERSON_NOTE_RE = re.compile(r'\s*\(.*?\)\s*$')
+CREDIT_SOURCES = (
+    ('director', 'director'),
+    ('writer', 'writer'),
+    ('actor', 'actors')
+)
+
+
+def parse_rating(value):
+    try:
+        return Decimal(value.strip())
+    except (AttributeError, InvalidOperation):
+        return None
+
+
+def parse_runtime(value):
+    match = RUNTIME_RE.match(value or '')
+    return int(match.group(1)) if match else None
+
+
+def parse_box_office(value):
+    digits = re.sub(r'[$,\s]', '', value or '')
+    return int(digits) if digits.isdigit() else None
+
+
+def parse_people(value):
+    names = (
+        PERSON_NOTE_RE.sub('', name).strip()
+        for name in (value or '').split(',')
+    )
+    return list(dict.fromkeys(
+        name for name in names if name and name != 'N/A'
+    ))
+
+
+def typed_fields(data):
+    return {
+        'imdb_rating_value': parse_rating(data.get('imdb_rating')),
+        'runtime_minutes': parse_runtime(data.get('runtime')),
+        'box_office_amount': parse_box_office(data.get('box_office'))
+    }
+
+
+def backfill_chunk(apps, rows):
+    Movie = apps.get_model('movies', 'Movie')
+    Person = apps.get_model('movies', 'Person')
+    Credit = apps.get_model('movies', 'Credit')
+    credits = [
+        (row['imdb_id'], role, position, name)
+        for row in rows
+        for role, field_name in CREDIT_SOURCES
+        for position, name in enumerate(parse_people(row[field_name]))
+    ]
+    names = {name for _, _, _, name in credits}
+    people = dict(
+        Person.objects.filter(name__in=names).values_list('name', 'pk')
+    )
+    new_people = Person.objects.bulk_create(
+        Person(name=name) for name in names - set(people)
+    )
+    people.update((person.name, person.pk) for person in new_people)
+    Credit.objects.filter(
+        movie_id__in=[row['imdb_id'] for row in rows]
+    ).delete()
+    Credit.objects.bulk_create(
+        Credit(
+            movie_id=movie_id, person_id=people[name], role=role,
+            position=position
+        )
+        for movie_id, role, position, name in credits
+    )
+    for row in rows:
+        Movie.objects.filter(pk=row['imdb_id']).update(**typed_fields(row))
+
+
+def backfill(apps, schema_editor):
+    """Populate typed columns and credits, committing chunk by chunk."""
+    Movie = apps.get_model('movies', 'Movie')
+    last_pk = ''
+    while True:
+        rows = list(Movie.objects.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).values(
+            'imdb_id', 'imdb_rating', 'runtime', 'box_office', 'director',
+            'writer', 'actors'
+        )[:CHUNK_SIZE])
+        if not rows:
+            break
+        with transaction.atomic():
+            backfill_chunk(apps, rows)
+        last_pk = rows[-1]['imdb_id']
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('movies', '0007_movie_credits_typed_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
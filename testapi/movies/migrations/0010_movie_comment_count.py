@@ -0,0 +1,39 @@
+# Generated by Django 2.1.2 on 2026-10-18 21:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def populate_comment_counts(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    Comment = apps.get_model('movies', 'Comment')
+    Movie.objects.filter(
+        pk__in=Comment.objects.values('movie')
+    ).update(comment_count=Subquery(
+        Comment.objects.filter(movie=OuterRef('pk')).order_by().values(
+            'movie'
+        ).annotate(total=Count('pk')).values('total'),
+        output_field=models.IntegerField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_comment_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['comment_count'], name='movies_movi_comment_3e7a91_idx'),
+        ),
+        migrations.RunPython(
+            populate_comment_counts, migrations.RunPython.noop
+        ),
+    ]
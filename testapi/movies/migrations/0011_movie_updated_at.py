@@ -0,0 +1,24 @@
+# Generated by Django 2.1.2 on 2026-10-18 21:22
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_movie_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['updated_at', 'imdb_id'], name='movies_movi_updated_49779b_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.contrib.postgres.fields import ArrayField, JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -28,12 +30,133 @@ class Movie(models.Model):
     box_office = models.CharField(max_length=63)
     production = models.CharField(max_length=255)
     website = models.CharField(max_length=255)
+    # Typed copies of imdb_rating, runtime and box_office for sorting and
+    # filtering, see movies.normalization.
+    imdb_rating_value = models.DecimalField(
+        max_digits=3, decimal_places=1, null=True, editable=False
+    )
+    runtime_minutes = models.PositiveIntegerField(null=True, editable=False)
+    box_office_amount = models.BigIntegerField(null=True, editable=False)
+    # Maintained with F() updates on comment insert and delete, see
+    # movies.rollups.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Also set by comment_count updates, incremental exports select rows
+    # changed since a cutoff by it.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger from title, director, writer,
+    # actors and plot.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['genre']),
+            GinIndex(fields=['language']),
+            GinIndex(fields=['country']),
+            models.Index(fields=['year']),
+            models.Index(fields=['metascore']),
+            models.Index(fields=['imdb_votes']),
+            models.Index(fields=['imdb_rating_value']),
+            models.Index(fields=['runtime_minutes']),
+            models.Index(fields=['box_office_amount']),
+            models.Index(fields=['comment_count']),
+            models.Index(fields=['updated_at', 'imdb_id'])
+        ]
+
+
+class Person(models.Model):
+
+    name = models.CharField(max_length=255, unique=True)
+
+
+class Credit(models.Model):
+
+    """Person credited as director, writer or actor of a movie."""
+
+    DIRECTOR = 'director'
+    WRITER = 'writer'
+    ACTOR = 'actor'
+    ROLES = (
+        (DIRECTOR, 'Director'),
+        (WRITER, 'Writer'),
+        (ACTOR, 'Actor')
+    )
+
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name='credits'
+    )
+    person = models.ForeignKey(
+        Person, on_delete=models.CASCADE, related_name='credits'
+    )
+    role = models.CharField(max_length=15, choices=ROLES)
+    position = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('movie', 'role', 'person')
+        indexes = [models.Index(fields=['person', 'role'])]
 
 
 class Comment(models.Model):
 
+    # Indexed by the leading column of the (movie, created_at) index.
     movie = models.ForeignKey(
-        Movie, on_delete=models.CASCADE, related_name='comments'
+        Movie, on_delete=models.CASCADE, related_name='comments',
+        db_index=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     text = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['movie', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at', 'id'])
+        ]
+
+
+class DailyCommentCount(models.Model):
+
+    """Number of comments added to a movie on a given day."""
+
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name='daily_comment_counts'
+    )
+    day = models.DateField()
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('movie', 'day')
+        indexes = [models.Index(fields=['day', 'movie'])]
+
+
+class IngestionJob(models.Model):
+
+    """Background fetch of a movie from OMDb."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    ACTIVE_STATUSES = (PENDING, RUNNING)
+
+    title = models.CharField(max_length=255)
+    normalized_title = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=15, choices=STATUS_CHOICES, default=PENDING
+    )
+    movie = models.ForeignKey(
+        Movie, null=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
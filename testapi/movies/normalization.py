@@ -0,0 +1,105 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+
+from movies.models import Credit, Person
+
+
+RUNTIME_RE = re.compile(r'^\s*(\d+)\s*min')
+PERSON_NOTE_RE = re.compile(r'\s*\(.*?\)\s*$')
+CREDIT_SOURCES = (
+    (Credit.DIRECTOR, 'director'),
+    (Credit.WRITER, 'writer'),
+    (Credit.ACTOR, 'actors')
+)
+
+
+def parse_rating(value):
+    """Return "5.9" as Decimal('5.9'), None for missing values."""
+    try:
+        return Decimal(value.strip())
+    except (AttributeError, InvalidOperation):
+        return None
+
+
+def parse_runtime(value):
+    """Return "65 min" as 65, None for missing values."""
+    match = RUNTIME_RE.match(value or '')
+    return int(match.group(1)) if match else None
+
+
+def parse_box_office(value):
+    """Return "$512,841" as 512841, None for missing values."""
+    digits = re.sub(r'[$,\s]', '', value or '')
+    return int(digits) if digits.isdigit() else None
+
+
+def parse_people(value):
+    """Return distinct names from "John Smith (story), Ian King"."""
+    names = (
+        PERSON_NOTE_RE.sub('', name).strip()
+        for name in (value or '').split(',')
+    )
+    return list(dict.fromkeys(
+        name for name in names if name and name != 'N/A'
+    ))
+
+
+def typed_fields(data):
+    """Return typed movie columns derived from OMDb text values."""
+    return {
+        'imdb_rating_value': parse_rating(data.get('imdb_rating')),
+        'runtime_minutes': parse_runtime(data.get('runtime')),
+        'box_office_amount': parse_box_office(data.get('box_office'))
+    }
+
+
+def movie_credits(movie):
+    """Return (role, position, name) tuples for movie people columns."""
+    return [
+        (role, position, name)
+        for role, field_name in CREDIT_SOURCES
+        for position, name in enumerate(
+            parse_people(getattr(movie, field_name))
+        )
+    ]
+
+
+def get_people(names):
+    """Return {name: Person} for names, creating missing ones."""
+    names = set(names)
+    people = {
+        person.name: person
+        for person in Person.objects.filter(name__in=names)
+    }
+    missing = [Person(name=name) for name in names - set(people)]
+    try:
+        with transaction.atomic():
+            Person.objects.bulk_create(missing)
+    except IntegrityError:
+        # Created meanwhile by another writer.
+        missing = [
+            Person.objects.get_or_create(name=person.name)[0]
+            for person in missing
+        ]
+    people.update((person.name, person) for person in missing)
+    return people
+
+
+def sync_credits(movies):
+    """Replace credits of movies with the ones of their people columns."""
+    credits = {movie.pk: movie_credits(movie) for movie in movies}
+    people = get_people(
+        name for items in credits.values() for _, _, name in items
+    )
+    with transaction.atomic():
+        Credit.objects.filter(movie__in=list(credits)).delete()
+        Credit.objects.bulk_create(
+            Credit(
+                movie_id=movie_id, person=people[name], role=role,
+                position=position
+            )
+            for movie_id, items in credits.items()
+            for role, position, name in items
+        )
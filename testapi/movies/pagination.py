@@ -0,0 +1,319 @@
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator
+)
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination
+)
+from rest_framework.response import Response
+
+
+def estimate_row_count(queryset):
+    """Return planner estimate of the number of rows in the model table."""
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return max(int(row[0]), 0) if row else 0
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class EstimatedCountPage(Page):
+
+    has_more = False
+
+    def has_next(self):
+        if self.paginator.count_is_exact:
+            return super().has_next()
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+
+    """Paginator which avoids exact COUNT(*) on large results.
+
+    Unfiltered querysets of big tables use the planner row estimate,
+    filtered ones are counted up to a cap.
+    """
+
+    @cached_property
+    def _count_info(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset)
+            if estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+                return estimate, False
+            return queryset.count(), True
+        cap = settings.PAGINATION_COUNT_CAP
+        count = queryset.order_by()[:cap + 1].count()
+        if count > cap:
+            return cap, False
+        return count, True
+
+    @property
+    def count(self):
+        return self._count_info[0]
+
+    @property
+    def count_is_exact(self):
+        return self._count_info[1]
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        # Pages past an inexact count may exist, page() checks for rows.
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        page = self._get_page(object_list[:self.per_page], number, self)
+        page.has_more = len(object_list) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedCountPage(*args, **kwargs)
+
+
+class EstimatedCountPagination(StandardResultsSetPagination):
+
+    """Page number pagination reporting whether the count is exact."""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_exact', self.page.paginator.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+def _reverse_term(term):
+    return term[1:] if term.startswith('-') else '-' + term
+
+
+def _get_field(model, name):
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def _after(field, name, value, descending):
+    """Q of the rows sorted after value, None if there are none.
+
+    PostgreSQL sorts NULLs after every value, last in ascending and first
+    in descending order.
+    """
+    if descending:
+        if value is None:
+            return Q(**{f'{name}__isnull': False})
+        return Q(**{f'{name}__lt': value})
+    if value is None:
+        return None
+    after = Q(**{f'{name}__gt': value})
+    if field.null:
+        after |= Q(**{f'{name}__isnull': True})
+    return after
+
+
+def _equal(name, value):
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+def _bound(field, name, value, descending):
+    """Q of the rows sorted at or after value, None if that is all rows."""
+    if value is None:
+        return None if descending else _equal(name, value)
+    bound = Q(**{f'{name}__{"lte" if descending else "gte"}': value})
+    if field.null and not descending:
+        bound |= Q(**{f'{name}__isnull': True})
+    return bound
+
+
+def seek_filter(model, ordering, position):
+    """Q of the rows after position, the values of the ordering fields.
+
+    The row comparison (a, b) > (x, y) is expanded to a > x OR a = x AND
+    b > y, descending fields compare the other way round. The bound on
+    the first field is repeated on its own, so an index on it limits the
+    scan.
+    """
+    seek = None
+    equal = Q()
+    for term, value in zip(ordering, position):
+        name = term.lstrip('-')
+        after = _after(
+            _get_field(model, name), name, value, term.startswith('-')
+        )
+        if after is not None:
+            after = equal & after
+            seek = after if seek is None else seek | after
+        equal &= _equal(name, value)
+    if seek is None:
+        return Q(pk__in=[])
+    name = ordering[0].lstrip('-')
+    bound = _bound(
+        _get_field(model, name), name, position[0],
+        ordering[0].startswith('-')
+    )
+    return seek if bound is None else bound & seek
+
+
+class KeysetResultsSetPagination(CursorPagination):
+
+    """Seek pagination on the ordering fields and the pk, no total count.
+
+    The pk is appended to orderings which do not end with a unique field.
+    Cursors hold the values of every ordering field of the row at the
+    page boundary, the next page starts right after it without OFFSET.
+    Querysets which are ordered differently than requested, like ranked
+    search results, cannot be paginated this way and are rejected.
+    """
+
+    ordering = ('pk',)
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    unsupported_ordering_message = (
+        'Results in this order cannot be paginated with a cursor, pass an '
+        'ordering.'
+    )
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        current = tuple(queryset.query.order_by)
+        if current and current != tuple(ordering):
+            raise ValidationError({
+                self.cursor_query_param: [self.unsupported_ordering_message]
+            })
+        last = _get_field(queryset.model, ordering[-1].lstrip('-'))
+        if not (last.primary_key or last.unique):
+            prefix = '-' if ordering[-1].startswith('-') else ''
+            ordering.append(prefix + 'pk')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = None if self.cursor is None else self.cursor.position
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(_reverse_term(term) for term in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(
+                    seek_filter(queryset.model, ordering, position)
+                )
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next = bool(self.page)
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (
+                not isinstance(position, list) or
+                len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def get_position(self, item):
+        """Return the ordering values of a page item as cursor position."""
+        values = [
+            item[name] if isinstance(item, dict) else getattr(item, name)
+            for name in (term.lstrip('-') for term in self.ordering)
+        ]
+        return json.dumps(values, default=str)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False, position=self.get_position(self.page[-1])
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=True, position=self.get_position(self.page[0])
+        ))
+
+
+class KeysetPaginationMixin:
+
+    """Use keyset pagination when the request has a cursor parameter.
+
+    Clients opt in with an empty ``?cursor=`` and follow the next links,
+    other requests keep the page number pagination.
+    """
+
+    keyset_pagination_class = KeysetResultsSetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            cursor_param = self.keyset_pagination_class.cursor_query_param
+            if cursor_param in self.request.query_params:
+                self._paginator = self.keyset_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -0,0 +1,137 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Subquery, Sum
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from movies import top_cache, versions
+from movies.models import Comment, DailyCommentCount, Movie
+
+
+TOP_MOVIES_LIMIT = 5
+
+
+def comment_day(created_at):
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at)
+    return timezone.localtime(created_at).date()
+
+
+def add_movie_comments(movie_id, delta=1):
+    """Add delta to the total comment counter of movie."""
+    Movie.objects.filter(pk=movie_id).update(
+        comment_count=F('comment_count') + delta, updated_at=timezone.now()
+    )
+
+
+def add_comments(movie_id, day, delta=1):
+    """Add delta to the comment counter of movie on day."""
+    counts = DailyCommentCount.objects.filter(movie_id=movie_id, day=day)
+    if counts.update(comment_count=F('comment_count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            DailyCommentCount.objects.create(
+                movie_id=movie_id, day=day, comment_count=delta
+            )
+    except IntegrityError:
+        # Row was created concurrently.
+        counts.update(comment_count=F('comment_count') + delta)
+
+
+def count_new_comments(comments):
+    """Add inserted comments to the counters, return the affected days."""
+    counts = Counter(
+        (comment.movie_id, comment_day(comment.created_at))
+        for comment in comments
+    )
+    totals = Counter(comment.movie_id for comment in comments)
+    # Fixed order, concurrent batches lock counter rows the same way.
+    for movie_id, delta in sorted(totals.items()):
+        add_movie_comments(movie_id, delta)
+    for (movie_id, day), delta in sorted(counts.items()):
+        add_comments(movie_id, day, delta)
+    return {day for _, day in counts}
+
+
+def reconcile_movie_comment_counts(chunk_size=1000):
+    """Fix Movie.comment_count from the comments table.
+
+    Movies are processed in pk order, chunk by chunk, each in its own
+    transaction. Returns the number of corrected movies.
+    """
+    actual = Coalesce(Subquery(
+        Comment.objects.filter(movie=OuterRef('pk')).order_by().values(
+            'movie'
+        ).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    ), 0)
+    corrected = 0
+    last_pk = ''
+    while True:
+        pks = list(Movie.objects.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return corrected
+        with transaction.atomic():
+            chunk_corrected = Movie.objects.filter(pk__in=pks).exclude(
+                comment_count=actual
+            ).update(comment_count=actual, updated_at=timezone.now())
+            if chunk_corrected:
+                versions.bump('movies')
+        corrected += chunk_corrected
+        last_pk = pks[-1]
+
+
+def rebuild(chunk_size=1000):
+    """Recompute all counters from the comments table.
+
+    Cached rankings and their versions are dropped once the new counters
+    are committed.
+    """
+    with transaction.atomic():
+        DailyCommentCount.objects.all().delete()
+        rows = Comment.objects.annotate(
+            day=TruncDate('created_at')
+        ).values('movie_id', 'day').annotate(
+            comment_count=Count('id')
+        ).order_by()
+        batch = []
+        for row in rows.iterator():
+            batch.append(DailyCommentCount(**row))
+            if len(batch) >= chunk_size:
+                DailyCommentCount.objects.bulk_create(batch)
+                batch = []
+        DailyCommentCount.objects.bulk_create(batch)
+        top_cache.invalidate()
+        versions.bump('comments')
+
+
+def top_commented_movies(date_after, date_before, limit=TOP_MOVIES_LIMIT):
+    """Return movies with the most comments in [date_after, date_before).
+
+    Movies are annotated with total_comments, if fewer than limit movies
+    were commented the result is filled up with uncommented ones.
+    """
+    totals = DailyCommentCount.objects.filter(
+        day__gte=date_after, day__lt=date_before
+    ).values('movie_id').annotate(
+        total_comments=Sum('comment_count')
+    ).filter(total_comments__gt=0).order_by('-total_comments')[:limit]
+    totals = {row['movie_id']: row['total_comments'] for row in totals}
+    movies = list(Movie.objects.filter(pk__in=totals))
+    for movie in movies:
+        movie.total_comments = totals[movie.pk]
+    movies.sort(key=lambda movie: -movie.total_comments)
+    if len(movies) < limit:
+        uncommented = Movie.objects.exclude(
+            pk__in=totals
+        )[:limit - len(movies)]
+        for movie in uncommented:
+            movie.total_comments = 0
+            movies.append(movie)
+    return movies
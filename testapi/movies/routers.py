@@ -0,0 +1,94 @@
+import itertools
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_local = threading.local()
+_counter = itertools.count()
+
+
+def next_replica():
+    """Return the next replica alias round-robin, None without replicas."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    return replicas[next(_counter) % len(replicas)]
+
+
+@contextmanager
+def replica_reads():
+    """Send reads of this thread to one replica until the block ends.
+
+    Also usable as a view method decorator. All queries of the block use
+    the same replica, so a count and its page see the same data.
+    """
+    previous = getattr(_local, 'replica', None)
+    _local.replica = next_replica()
+    try:
+        yield _local.replica
+    finally:
+        _local.replica = previous
+
+
+@contextmanager
+def primary_reads():
+    """Send reads of this thread to the primary until the block ends.
+
+    Overrides an enclosing replica_reads(), also usable as a decorator.
+    """
+    previous = getattr(_local, 'replica', None)
+    _local.replica = None
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+def pin(pinned=True):
+    """Keep reads of this thread on the primary, or stop doing so."""
+    _local.pinned = pinned
+    if not pinned:
+        _local.wrote = False
+
+
+def is_pinned():
+    return getattr(_local, 'pinned', False)
+
+
+def wrote():
+    """Whether this thread wrote since it was last unpinned."""
+    return getattr(_local, 'wrote', False)
+
+
+class ReplicaRouter:
+
+    """Route reads inside replica_reads() blocks to a read replica.
+
+    Reads go to the primary when the thread is pinned, wrote before or is
+    inside a transaction, a replica would not see those changes yet.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_local, 'replica', None)
+        if (
+                replica is None or is_pinned() or
+                connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        pin()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
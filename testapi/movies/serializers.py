@@ -1,13 +1,63 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
-from movies.models import Comment, Movie
+from movies import rollups, top_cache, versions
+from movies.instrumentation import TimedSerializerMixin
+from movies.models import Comment, IngestionJob, Movie
 
 
-class MovieSerializer(serializers.ModelSerializer):
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class DynamicFieldsModelSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer):
+
+    """Model serializer limited to the fields given on initialization."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class MovieSerializer(DynamicFieldsModelSerializer):
+
+    def update(self, instance, validated_data):
+        """Save only the columns whose values actually changed."""
+        changed_fields = [
+            name for name, value in validated_data.items()
+            if getattr(instance, name) != value
+        ]
+        for name in changed_fields:
+            setattr(instance, name, validated_data[name])
+        if changed_fields:
+            instance.save(update_fields=changed_fields + ['updated_at'])
+        return instance
 
     class Meta:
         model = Movie
-        fields = '__all__'
+        exclude = (
+            'search_vector', 'imdb_rating_value', 'runtime_minutes',
+            'box_office_amount', 'updated_at'
+        )
+        list_serializer_class = TimedListSerializer
+        representations = {
+            'summary': ('imdb_id', 'title', 'year', 'poster'),
+        }
+
+
+class MovieExportSerializer(MovieSerializer):
+
+    class Meta(MovieSerializer.Meta):
+        exclude = (
+            'search_vector', 'imdb_rating_value', 'runtime_minutes',
+            'box_office_amount'
+        )
 
 
 class ExternalMovieSerializer(serializers.Serializer):
@@ -40,14 +90,86 @@ class ExternalMovieSerializer(serializers.Serializer):
     Website = serializers.CharField(max_length=255, source='website')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+
+    """Primary key field resolving preloaded instances without a query."""
+
+    preloaded = None
+
+    def preload(self, pks):
+        pks = {pk for pk in pks if isinstance(pk, (str, int))}
+        self.preloaded = self.get_queryset().only('pk').in_bulk(
+            [str(pk) for pk in pks]
+        )
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, (str, int)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.preloaded[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class CommentListSerializer(TimedListSerializer):
+
+    """Validate and insert a batch of comments.
+
+    Referenced movies are loaded with one query, rows are inserted in
+    COMMENTS_BULK_CHUNK_SIZE chunks within a single transaction.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if len(data) > settings.COMMENTS_BULK_MAX_ITEMS:
+                raise serializers.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        f'Ensure this list has at most '
+                        f'{settings.COMMENTS_BULK_MAX_ITEMS} items.'
+                    ]
+                })
+            self.child.fields['movie'].preload(
+                item.get('movie') for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        comments = [Comment(**attrs) for attrs in validated_data]
+        chunk_size = settings.COMMENTS_BULK_CHUNK_SIZE
+        with transaction.atomic():
+            for start in range(0, len(comments), chunk_size):
+                Comment.objects.bulk_create(
+                    comments[start:start + chunk_size]
+                )
+            # bulk_create sends no post_save signals.
+            days = rollups.count_new_comments(comments)
+            versions.bump('comments', 'movies', *{
+                f'comments:{comment.movie_id}' for comment in comments
+            })
+        for day in days:
+            top_cache.invalidate(day=day)
+        return comments
+
+
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+
+    movie = PreloadedPrimaryKeyRelatedField(queryset=Movie.objects.all())
 
     class Meta:
         model = Comment
-        fields = '__all__'
+        exclude = ('updated_at',)
+        list_serializer_class = CommentListSerializer
+
 
+class CommentExportSerializer(CommentSerializer):
 
-class TopCommentedMoviesListSerializer(serializers.ListSerializer):
+    class Meta(CommentSerializer.Meta):
+        exclude = ()
+
+
+class TopCommentedMoviesListSerializer(TimedListSerializer):
 
     def to_representation(self, data):
         result = super().to_representation(data)
@@ -64,7 +186,8 @@ class TopCommentedMoviesListSerializer(serializers.ListSerializer):
         return result
 
 
-class TopCommentedMovieSerializer(serializers.ModelSerializer):
+class TopCommentedMovieSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer):
 
     total_comments = serializers.IntegerField()
 
@@ -82,3 +205,26 @@ class DateRangeSerializer(serializers.Serializer):
 
     date_after = serializers.DateField()
     date_before = serializers.DateField()
+
+
+class MovieImportSerializer(serializers.Serializer):
+
+    titles = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=settings.MOVIES_IMPORT_MAX_ITEMS
+    )
+
+
+class IngestionJobSerializer(
+        TimedSerializerMixin, serializers.ModelSerializer):
+
+    url = serializers.HyperlinkedIdentityField(view_name='movie-job')
+    movie = MovieSerializer(read_only=True)
+
+    class Meta:
+        model = IngestionJob
+        fields = (
+            'id', 'url', 'title', 'status', 'error', 'movie', 'created_at',
+            'updated_at'
+        )
@@ -1,16 +1,245 @@
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from copy import deepcopy
 
 import requests
 from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Upper
+from rest_framework.exceptions import ValidationError
 
-from movies import OmdbApiException, serializers
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from movies import (
+    OmdbApiException, OmdbApiUnavailable, instrumentation, normalization,
+    serializers, top_cache, versions
+)
+from movies.models import Movie
 
-def fetch_movie_omdapi(title):
-    api_key = settings.MOVIES_API_KEY
-    url = f'http://www.omdbapi.com/?apikey={api_key}&t={title}'
-    content = requests.get(url).json()
-    if not content['Response'] == 'True':
+
+IMDB_ID_RE = re.compile(r'^tt\d+$')
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# OMDb answers 401 to an invalid api key and once the quota is used up.
+REJECTED_STATUSES = (401,)
+NOT_FOUND_ERROR = 'Movie not found!'
+
+
+class CircuitBreaker:
+
+    """Fail fast after repeated upstream failures.
+
+    After failure_threshold consecutive failures the circuit opens and
+    calls are rejected until reset_timeout seconds pass, then a single
+    trial call is let through. Its success closes the circuit, a failure
+    opens it again. Should the trial never report back, another one is
+    let through after reset_timeout.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                # Half-open, restarting the timeout rejects the other
+                # calls while the trial runs, its failure reopens.
+                self.opened_at = now
+                self.failures = self.failure_threshold - 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class OmdbClient:
+
+    """OMDb api client with pooled keep-alive connections and retries."""
+
+    def __init__(
+            self, api_key, url, pool_size, connect_timeout, read_timeout,
+            max_retries, backoff_factor, failure_threshold, reset_timeout):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold, reset_timeout
+        )
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            method_whitelist=('GET',),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            api_key=settings.MOVIES_API_KEY,
+            url=settings.OMDB_API_URL,
+            pool_size=settings.OMDB_POOL_SIZE,
+            connect_timeout=settings.OMDB_CONNECT_TIMEOUT,
+            read_timeout=settings.OMDB_READ_TIMEOUT,
+            max_retries=settings.OMDB_MAX_RETRIES,
+            backoff_factor=settings.OMDB_BACKOFF_FACTOR,
+            failure_threshold=settings.OMDB_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.OMDB_CIRCUIT_RESET_TIMEOUT
+        )
+
+    def get(self, **params):
+        """Return decoded OMDb response for the given query parameters."""
+        if not self.circuit_breaker.allow_request():
+            raise OmdbApiUnavailable('Omdb Api is unavailable.')
+        try:
+            with instrumentation.upstream_request():
+                response = self.session.get(
+                    self.url, params=dict(apikey=self.api_key, **params),
+                    timeout=self.timeout
+                )
+        except requests.RequestException:
+            self.circuit_breaker.record_failure()
+            raise OmdbApiUnavailable('Omdb Api is unavailable.')
+        if response.status_code in RETRY_STATUSES:
+            self.circuit_breaker.record_failure()
+            raise OmdbApiUnavailable('Omdb Api is unavailable.')
+        try:
+            content = response.json()
+        except ValueError:
+            content = None
+        if response.status_code in REJECTED_STATUSES:
+            self.circuit_breaker.record_failure()
+            raise rejected(content)
+        self.circuit_breaker.record_success()
+        if content is None:
+            raise OmdbApiUnavailable('Omdb Api returned invalid response.')
+        return content
+
+
+def rejected(content):
+    """Return the exception for a request OMDb refused to answer."""
+    error = isinstance(content, dict) and content.get('Error')
+    return OmdbApiUnavailable(
+        f'Omdb Api rejected the request: {error}' if error
+        else 'Omdb Api rejected the request.'
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OmdbClient.from_settings()
+        return _client
+
+
+def normalize_title(title):
+    return ' '.join(title.split()).lower()
+
+
+def _cache_key(kind, value):
+    digest = hashlib.md5(value.encode('utf-8')).hexdigest()
+    return f'omdb:{kind}:{digest}'
+
+
+def _get_cache():
+    return caches[settings.OMDB_CACHE_ALIAS]
+
+
+def omdb_lookup(title=None, imdb_id=None):
+    """Return OMDb query parameters and cache key for a movie lookup."""
+    if imdb_id:
+        return {'i': imdb_id}, _cache_key('imdb', imdb_id.strip().lower())
+    return {'t': title}, _cache_key('title', normalize_title(title))
+
+
+def get_cached_movie(key):
+    """Return cached movie data, raise for cached "not found" answers."""
+    cached = _get_cache().get(key)
+    if cached is None:
+        return None
+    found, value = cached
+    if not found:
+        raise OmdbApiException(value)
+    return deepcopy(value)
+
+
+def cache_movie(key, data):
+    """Cache movie under the lookup key, its title and imdbID."""
+    _get_cache().set_many({
+        key: (True, data),
+        _cache_key('title', normalize_title(data['title'])): (True, data),
+        _cache_key('imdb', data['imdb_id'].lower()): (True, data)
+    })
+
+
+def cache_missing_movie(key, exception):
+    """Cache a "not found" answer, other errors are not cached."""
+    if str(exception) != NOT_FOUND_ERROR:
+        return
+    _get_cache().set(
+        key, (False, str(exception)), settings.OMDB_NEGATIVE_CACHE_TIMEOUT
+    )
+
+
+def fetch_movie_omdapi(title=None, imdb_id=None, refresh=False):
+    """Return validated OMDb data for title or imdb_id, cached if possible.
+
+    Positive results are stored under both the normalized title and the
+    imdbID, "Movie not found!" answers are cached for a shorter period,
+    other errors are not cached.
+
+    With refresh the cached entry is ignored and replaced.
+    """
+    params, key = omdb_lookup(title, imdb_id)
+    if not refresh:
+        data = get_cached_movie(key)
+        if data is not None:
+            return data
+    try:
+        data = parse_movie(get_client().get(**params))
+    except OmdbApiUnavailable:
+        raise
+    except OmdbApiException as exception:
+        cache_missing_movie(key, exception)
+        raise
+    cache_movie(key, data)
+    return deepcopy(data)
+
+
+def parse_movie(content):
+    """Validate decoded OMDb response, return data for MovieSerializer."""
+    if not content.get('Response') == 'True':
         raise OmdbApiException(content.get('Error', 'Omdb Api Error.'))
     if content.get('imdbVotes'):
         content['imdbVotes'] = content['imdbVotes'].replace(',', '')
@@ -18,6 +247,195 @@ def fetch_movie_omdapi(title):
     serializer.is_valid(raise_exception=True)
     data = deepcopy(serializer.validated_data)
     for field_name in ('language', 'country', 'genre'):
-        data[field_name] = data[field_name].split(',')
+        data[field_name] = [
+            value.strip() for value in data[field_name].split(',')
+        ]
     return data
 
+
+def get_stored_movie(title):
+    """Return the stored movie titled title regardless of case, or None.
+
+    Of movies sharing the title the most voted one wins, like OMDb's own
+    title lookup, ties are broken by imdbID.
+    """
+    return Movie.objects.filter(title__iexact=title.strip()).order_by(
+        '-imdb_votes', 'pk'
+    ).first()
+
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def ingest_movie(title, refresh=False):
+    """Return (movie, created) for title, fetched from OMDb if needed.
+
+    With refresh the movie is always re-fetched and an existing row is
+    updated. Concurrent calls for the same title share a single fetch and
+    insert, within the process through a shared future and across
+    processes through a database advisory lock.
+    """
+    key = (normalize_title(title), refresh)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+    if not leader:
+        movie, _ = future.result()
+        return movie, False
+    try:
+        result = _ingest_movie_locked(title, refresh)
+    except BaseException as exception:
+        future.set_exception(exception)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+def _advisory_lock_id(value):
+    digest = hashlib.md5(value.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def _ingest_movie_locked(title, refresh):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(%s)',
+                [_advisory_lock_id(f'movie:{normalize_title(title)}')]
+            )
+        if not refresh:
+            movie = get_stored_movie(title)
+            if movie is not None:
+                return movie, False
+        data = fetch_movie_omdapi(title, refresh=refresh)
+        movie = Movie.objects.filter(pk=data['imdb_id']).first()
+        if movie is not None and not refresh:
+            return movie, False
+        serializer = serializers.MovieSerializer(movie, data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                saved = serializer.save(**normalization.typed_fields(data))
+                normalization.sync_credits([saved])
+                return saved, movie is None
+        except IntegrityError:
+            # Inserted meanwhile under a different title.
+            return Movie.objects.get(pk=data['imdb_id']), False
+
+
+def import_movies(queries, concurrency=None, chunk_size=None):
+    """Fetch and store movies for a list of titles or imdbIDs.
+
+    Upstream requests run in a bounded thread pool or, with the asyncio
+    OMDB_IMPORT_BACKEND, on an event loop. Rows and their credits are
+    inserted in chunks. Returns one result dict per distinct query,
+    failures of single items are reported instead of aborting the whole
+    batch.
+    """
+    concurrency = concurrency or settings.OMDB_IMPORT_CONCURRENCY
+    chunk_size = chunk_size or settings.MOVIES_IMPORT_CHUNK_SIZE
+    queries = list(dict.fromkeys(
+        query.strip() for query in queries if query.strip()
+    ))
+    results = {query: {'query': query} for query in queries}
+
+    for query, imdb_id in _find_existing_movies(queries).items():
+        results[query].update(status='exists', imdb_id=imdb_id)
+
+    to_fetch = [query for query in queries if 'status' not in results[query]]
+    if settings.OMDB_IMPORT_BACKEND == 'asyncio':
+        from movies import async_services
+        fetched = async_services.fetch_many(to_fetch, concurrency)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            fetched = list(executor.map(
+                instrumentation.bind(_fetch_for_import), to_fetch
+            ))
+    movies = {}
+    for query, (data, error) in zip(to_fetch, fetched):
+        if error is not None:
+            results[query].update(status='error', error=error)
+            continue
+        results[query]['imdb_id'] = data['imdb_id']
+        movies.setdefault(data['imdb_id'], (
+            Movie(**data, **normalization.typed_fields(data)), []
+        ))
+        movies[data['imdb_id']][1].append(query)
+
+    items = list(movies.values())
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        created = _insert_movies([movie for movie, _ in chunk])
+        normalization.sync_credits(
+            [movie for movie, _ in chunk if movie.pk in created]
+        )
+        for movie, chunk_queries in chunk:
+            status = 'created' if movie.pk in created else 'exists'
+            for query in chunk_queries:
+                results[query]['status'] = status
+    return [results[query] for query in queries]
+
+
+def _find_existing_movies(queries):
+    imdb_ids = [query for query in queries if IMDB_ID_RE.match(query)]
+    titles = {
+        query.upper(): query for query in queries
+        if not IMDB_ID_RE.match(query)
+    }
+    existing = {
+        imdb_id: imdb_id for imdb_id in
+        Movie.objects.filter(pk__in=imdb_ids).values_list('pk', flat=True)
+    }
+    matches = Movie.objects.annotate(
+        upper_title=Upper('title')
+    ).filter(upper_title__in=titles).values_list('upper_title', 'pk')
+    for upper_title, imdb_id in matches:
+        existing[titles[upper_title]] = imdb_id
+    return existing
+
+
+def _fetch_for_import(query):
+    try:
+        if IMDB_ID_RE.match(query):
+            return fetch_movie_omdapi(imdb_id=query), None
+        return fetch_movie_omdapi(query), None
+    except OmdbApiException as exception:
+        return None, str(exception)
+    except ValidationError as exception:
+        return None, exception.detail
+
+
+def _insert_movies(movies):
+    """Insert movies skipping already stored ones, return created pks."""
+    existing = set(Movie.objects.filter(
+        pk__in=[movie.pk for movie in movies]
+    ).values_list('pk', flat=True))
+    new_movies = [movie for movie in movies if movie.pk not in existing]
+    try:
+        with transaction.atomic():
+            Movie.objects.bulk_create(new_movies)
+        if new_movies:
+            # bulk_create sends no post_save, do what its receivers do.
+            top_cache.invalidate(short=True)
+            versions.bump('movies')
+        return {movie.pk for movie in new_movies}
+    except IntegrityError:
+        pass
+    # Another writer inserted some of the rows meanwhile, fall back to
+    # inserting one by one.
+    created = set()
+    for movie in new_movies:
+        try:
+            with transaction.atomic():
+                movie.save(force_insert=True)
+        except IntegrityError:
+            continue
+        created.add(movie.pk)
+    return created
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from movies import rollups, top_cache, versions
+from movies.models import Comment, Movie
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_day(sender, instance, **kwargs):
+    instance._previous_day = None
+    if not instance._state.adding:
+        previous = Comment.objects.filter(pk=instance.pk).values_list(
+            'movie_id', 'created_at'
+        ).first()
+        if previous is not None:
+            instance._previous_day = (
+                previous[0], rollups.comment_day(previous[1])
+            )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    current = (instance.movie_id, rollups.comment_day(instance.created_at))
+    previous = getattr(instance, '_previous_day', None)
+    if not created and previous == current:
+        return
+    if previous is not None:
+        rollups.add_comments(*previous, delta=-1)
+        top_cache.invalidate(day=previous[1])
+    if created or previous is not None and previous[0] != current[0]:
+        if previous is not None:
+            rollups.add_movie_comments(previous[0], delta=-1)
+        rollups.add_movie_comments(current[0])
+    rollups.add_comments(*current)
+    top_cache.invalidate(day=current[1])
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    day = rollups.comment_day(instance.created_at)
+    rollups.add_movie_comments(instance.movie_id, delta=-1)
+    rollups.add_comments(instance.movie_id, day, delta=-1)
+    top_cache.invalidate(day=day)
+
+
+@receiver(post_save, sender=Movie)
+def invalidate_short_rankings(sender, instance, created, **kwargs):
+    # Rankings with fewer rows than the limit list every stored movie.
+    if created:
+        top_cache.invalidate(short=True)
+
+
+@receiver(post_delete, sender=Movie)
+def invalidate_rankings(sender, instance, **kwargs):
+    top_cache.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def bump_comment_versions(sender, instance, **kwargs):
+    # Comment changes also change comment_count shown on /movies/.
+    scopes = {'comments', 'movies', f'comments:{instance.movie_id}'}
+    previous = getattr(instance, '_previous_day', None)
+    if previous is not None:
+        scopes.add(f'comments:{previous[0]}')
+    versions.bump(*scopes)
+
+
+@receiver([post_save, post_delete], sender=Movie)
+def bump_movie_versions(sender, instance, **kwargs):
+    versions.bump('movies')
@@ -0,0 +1,90 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+
+from movies import services
+from movies.models import Movie
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_omdb_client(monkeypatch):
+    monkeypatch.setattr(services, '_client', None)
+
+
+@pytest.fixture
+def external_movie_schema():
+    return {
+        'Title': 'TestMovie',
+        'Year': '2018',
+        'Rated': 'PG-13',
+        'Released': '01 Jun 2018',
+        'Runtime': '65 min',
+        'Genre': 'Action, Sci-Fi',
+        'Director': 'Kowalski',
+        'Writer': 'John Smith',
+        'Actors': 'Joseph Marshall, Ian King',
+        'Plot': 'Some twisted plot',
+        'Language': 'English, French',
+        'Country': 'USA, UK',
+        'Awards': 'Won 2 Oscars.',
+        'Poster': 'some-poster-path',
+        'Ratings': [
+            {'Source': 'Internet Movie Database', 'Value': '5.8/10'},
+            {'Source': 'Rotten Tomatoes', 'Value': '66%'}
+        ],
+        'Metascore': '65',
+        'imdbRating': '5.9',
+        'imdbVotes': '54,951',
+        'imdbID': 'tt2357596',
+        'Type': 'movie',
+        'DVD': '11 Aug 2018',
+        'BoxOffice': '$512,841',
+        'Production': 'Some company',
+        'Website': 'some-website',
+        'Response': 'True'
+    }
+
+
+@pytest.fixture
+def movie_schema():
+    return {
+        'title': 'TestMovie',
+        'year': 2018,
+        'rated': 'PG-13',
+        'released': '2018-06-01',
+        'runtime': '65 min',
+        'genre': ['Action', 'Sci-Fi'],
+        'director': 'Kowalski',
+        'writer': 'John Smith',
+        'actors': 'Joseph Marshall, Ian King',
+        'plot': 'Some twisted plot',
+        'language': ['English', 'French'],
+        'country': ['USA', 'UK'],
+        'awards': 'Won 2 Oscars.',
+        'poster': 'some-poster-path',
+        'ratings': [
+            {'Source': 'Internet Movie Database', 'Value': '5.8/10'},
+            {'Source': 'Rotten Tomatoes', 'Value': '66%'}
+        ],
+        'metascore': 65,
+        'imdb_rating': '5.9',
+        'imdb_votes': 54951,
+        'imdb_id': 'tt2357596',
+        'type': 'movie',
+        'dvd': '2018-08-11',
+        'box_office': '$512,841',
+        'production': 'Some company',
+        'website': 'some-website',
+        'comment_count': 0
+    }
+
+
+@pytest.fixture
+def movie(movie_schema):
+    return Movie.objects.create(**movie_schema)
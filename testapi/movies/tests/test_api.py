@@ -4,7 +4,11 @@ from datetime import datetime, timedelta
 import pytest
 import responses
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
+from movies import normalization
 from movies.models import Comment, Movie
 from movies.serializers import MovieSerializer
 
@@ -12,78 +16,6 @@ from movies.serializers import MovieSerializer
 pytestmark = pytest.mark.django_db
 
 
-@pytest.fixture
-def external_movie_schema():
-    return {
-        'Title': 'TestMovie',
-        'Year': '2018',
-        'Rated': 'PG-13',
-        'Released': '01 Jun 2018',
-        'Runtime': '65 min',
-        'Genre': 'Action, Sci-Fi',
-        'Director': 'Kowalski',
-        'Writer': 'John Smith',
-        'Actors': 'Joseph Marshall, Ian King',
-        'Plot': 'Some twisted plot',
-        'Language': 'English, French',
-        'Country': 'USA, UK',
-        'Awards': 'Won 2 Oscars.',
-        'Poster': 'some-poster-path',
-        'Ratings': [
-            {'Source': 'Internet Movie Database', 'Value': '5.8/10'},
-            {'Source': 'Rotten Tomatoes', 'Value': '66%'}
-        ],
-        'Metascore': '65',
-        'imdbRating': '5.9',
-        'imdbVotes': '54,951',
-        'imdbID': 'tt2357596',
-        'Type': 'movie',
-        'DVD': '11 Aug 2018',
-        'BoxOffice': '$512,841',
-        'Production': 'Some company',
-        'Website': 'some-website',
-        'Response': 'True'
-    }
-
-
-@pytest.fixture
-def movie_schema():
-    return {
-        'title': 'TestMovie',
-        'year': 2018,
-        'rated': 'PG-13',
-        'released': '2018-06-01',
-        'runtime': '65 min',
-        'genre': ['Action', 'Sci-Fi'],
-        'director': 'Kowalski',
-        'writer': 'John Smith',
-        'actors': 'Joseph Marshall, Ian King',
-        'plot': 'Some twisted plot',
-        'language': ['English', 'French'],
-        'country': ['USA', 'UK'],
-        'awards': 'Won 2 Oscars.',
-        'poster': 'some-poster-path',
-        'ratings': [
-            {'Source': 'Internet Movie Database', 'Value': '5.8/10'},
-            {'Source': 'Rotten Tomatoes', 'Value': '66%'}
-        ],
-        'metascore': 65,
-        'imdb_rating': '5.9',
-        'imdb_votes': 54951,
-        'imdb_id': 'tt2357596',
-        'type': 'movie',
-        'dvd': '2018-08-11',
-        'box_office': '$512,841',
-        'production': 'Some company',
-        'website': 'some-website'
-    }
-
-
-@pytest.fixture
-def movie(movie_schema):
-    return Movie.objects.create(**movie_schema)
-
-
 @pytest.fixture
 def different_movie(movie_schema):
     return Movie.objects.create(**dict(movie_schema, imdb_id='different'))
@@ -157,6 +89,36 @@ def test_failed_fetch_movies(client, movie_schema, external_movie_schema):
     assert response.json() == 'Omdb Api Error.'
 
 
+def test_fetch_existing_movie(client, movie, movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        response = client.post('/movies/', data={'title': 'testmovie'})
+        assert not requests_mock.calls
+    assert response.status_code == 200
+    assert response.json() == movie_schema
+
+
+def test_refresh_existing_movie(
+        client, movie, movie_schema, external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&t=TestMovie'
+            ),
+            body=json.dumps(dict(external_movie_schema, Plot='New plot')),
+            status=200,
+            content_type='application/json'
+        )
+        response = client.post(
+            '/movies/', data={'title': 'TestMovie', 'refresh': 'true'}
+        )
+    assert response.status_code == 200
+    assert response.json() == dict(movie_schema, plot='New plot')
+    movie.refresh_from_db()
+    assert movie.plot == 'New plot'
+
+
 def test_post_comment(client, movie):
     response = client.post(
         '/comments/', data={
@@ -228,4 +190,365 @@ def test_top_movies(
 def test_bad_request_top_movies(client):
     response = client.get('/top/?date_after=2017-01-01')
     assert response.status_code == 400
-    assert response.json() == {'date_before': ['This field is required.']}
\ No newline at end of file
+    assert response.json() == {'date_before': ['This field is required.']}
+
+
+def test_bulk_fetch_movies(client, movie, external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&i=tt0000001'
+            ),
+            body=json.dumps(
+                dict(external_movie_schema, imdbID='tt0000001', Title='New')
+            ),
+            status=200,
+            content_type='application/json'
+        )
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&t=Unknown'
+            ),
+            body='{"Response": "False", "Error": "Movie not found!"}',
+            status=200,
+            content_type='application/json'
+        )
+        response = client.post(
+            '/movies/bulk/',
+            data=json.dumps({'titles': ['testmovie', 'tt0000001', 'Unknown']}),
+            content_type='application/json'
+        )
+    assert response.status_code == 200
+    assert response.json()['results'] == [
+        {'query': 'testmovie', 'status': 'exists', 'imdb_id': 'tt2357596'},
+        {'query': 'tt0000001', 'status': 'created', 'imdb_id': 'tt0000001'},
+        {'query': 'Unknown', 'status': 'error', 'error': 'Movie not found!'}
+    ]
+    assert Movie.objects.get(pk='tt0000001').title == 'New'
+
+
+def test_top_movies_after_comment_delete(client, movie, different_movie):
+    comment = Comment.objects.create(text='test1', movie=movie)
+    Comment.objects.create(text='test2', movie=different_movie)
+    comment.delete()
+    date_before = (datetime.now().date() + timedelta(days=1)).isoformat()
+    response = client.get(
+        f'/top/?date_after=2017-01-01&date_before={date_before}'
+    )
+    assert response.json() == [
+        {'imdb_id': different_movie.imdb_id, 'total_comments': 1, 'rank': 1},
+        {'imdb_id': movie.imdb_id, 'total_comments': 0, 'rank': 2}
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_top_movies_cache(client, movie, different_movie):
+    Comment.objects.create(text='test1', movie=movie)
+    date_before = (datetime.now().date() + timedelta(days=1)).isoformat()
+    url = f'/top/?date_after=2017-01-01&date_before={date_before}'
+    assert client.get(url)['X-Cache'] == 'MISS'
+    response = client.get(url)
+    assert response['X-Cache'] == 'HIT'
+    assert response.json()[0]['imdb_id'] == movie.imdb_id
+
+    past_comment = Comment.objects.create(text='test2', movie=movie)
+    past_comment.created_at = datetime(2015, 6, 1, tzinfo=timezone.utc)
+    past_comment.save()
+    Comment.objects.create(text='test3', movie=different_movie)
+    Comment.objects.create(text='test4', movie=different_movie)
+    response = client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert response.json()[0]['imdb_id'] == different_movie.imdb_id
+
+    past_url = '/top/?date_after=2015-01-01&date_before=2016-01-01'
+    client.get(past_url)
+    Comment.objects.create(text='test5', movie=movie)
+    assert client.get(past_url)['X-Cache'] == 'HIT'
+    assert client.get('/top/cache/').json() == {'hits': 2, 'misses': 3}
+
+
+@pytest.mark.usefixtures('movie')
+def test_get_movies_sparse_fields(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            '/movies/?fields=imdb_id,title,genre&exclude=genre'
+        )
+    assert response.json()['results'] == [
+        {'imdb_id': 'tt2357596', 'title': 'TestMovie'}
+    ]
+    assert '"movies_movie"."plot"' not in queries[-1]['sql']
+    response = client.get('/movies/?representation=summary')
+    assert response.json()['results'] == [{
+        'imdb_id': 'tt2357596', 'title': 'TestMovie', 'year': 2018,
+        'poster': 'some-poster-path'
+    }]
+
+
+@pytest.mark.usefixtures('movie')
+def test_get_movies_unknown_fields(client):
+    response = client.get('/movies/?fields=title,unknown')
+    assert response.status_code == 400
+    assert response.json() == {'fields': ['Unknown fields: unknown.']}
+
+
+def test_search_movies(client, movie, movie_schema):
+    Movie.objects.create(**dict(
+        movie_schema, imdb_id='tt1', title='Other', plot='A twisted ending'
+    ))
+    Movie.objects.create(**dict(
+        movie_schema, imdb_id='tt2', title='Twisted', plot='Nothing'
+    ))
+    response = client.get('/movies/?search=twisted')
+    assert [
+        result['imdb_id'] for result in response.json()['results']
+    ] == ['tt2', 'tt1', 'tt2357596']
+    response = client.get('/movies/?search=twisted&ordering=-imdb_id')
+    assert [
+        result['imdb_id'] for result in response.json()['results']
+    ] == ['tt2357596', 'tt2', 'tt1']
+    response = client.get('/movies/?search=kowalski&title=Other')
+    assert [
+        result['imdb_id'] for result in response.json()['results']
+    ] == ['tt1']
+    assert client.get('/movies/?search=unknown').json()['results'] == []
+
+
+def test_search_movies_updates_index(client, movie):
+    movie.plot = 'A heist gone wrong'
+    movie.save()
+    response = client.get('/movies/?search=heist')
+    assert [
+        result['imdb_id'] for result in response.json()['results']
+    ] == ['tt2357596']
+    assert 'search_vector' not in response.json()['results'][0]
+
+
+def test_filter_movies(client, movie, movie_schema):
+    Movie.objects.create(**dict(
+        movie_schema, imdb_id='tt1', genre=['Drama'], language=['French'],
+        year=1999, metascore=80, imdb_votes=100
+    ))
+
+    def imdb_ids(query):
+        response = client.get(f'/movies/?{query}')
+        assert response.status_code == 200
+        return [result['imdb_id'] for result in response.json()['results']]
+
+    assert imdb_ids('genre=Action,Sci-Fi') == ['tt2357596']
+    assert imdb_ids('genre=Action,Drama') == []
+    assert imdb_ids('genre__overlap=Action,Drama') == ['tt1', 'tt2357596']
+    assert imdb_ids('language=French&country__overlap=UK') == [
+        'tt1', 'tt2357596'
+    ]
+    assert imdb_ids('language=French&genre=Sci-Fi') == ['tt2357596']
+    assert imdb_ids('year__gte=2000') == ['tt2357596']
+    assert imdb_ids('year__lte=2000&metascore__gte=70') == ['tt1']
+    assert imdb_ids('imdb_votes__gte=1000&year=2018') == ['tt2357596']
+    assert client.get('/movies/?year__gte=x').status_code == 400
+
+
+def test_filter_movies_by_credits_and_typed_columns(client, movie_schema):
+    movies = [
+        Movie.objects.create(**dict(
+            movie_schema, imdb_id='tt1', imdb_rating='10.0',
+            actors='Ian King', runtime='120 min'
+        )),
+        Movie.objects.create(**dict(
+            movie_schema, imdb_id='tt2', imdb_rating='9.5', runtime='N/A',
+            actors='Joseph Marshall'
+        ))
+    ]
+    for movie in movies:
+        Movie.objects.filter(pk=movie.pk).update(
+            **normalization.typed_fields(vars(movie))
+        )
+    normalization.sync_credits(movies)
+
+    def imdb_ids(query):
+        response = client.get(f'/movies/?{query}')
+        assert response.status_code == 200
+        return [result['imdb_id'] for result in response.json()['results']]
+
+    assert imdb_ids('ordering=-imdb_rating') == ['tt1', 'tt2']
+    assert imdb_ids('imdb_rating__gte=9.8') == ['tt1']
+    assert imdb_ids('runtime__gte=90') == ['tt1']
+    assert imdb_ids('actor=Joseph Marshall') == ['tt2']
+    assert imdb_ids('actor=Ian King&director=Kowalski') == ['tt1']
+    assert imdb_ids('director=Kowalski') == ['tt1', 'tt2']
+    assert imdb_ids('writer=Kowalski') == []
+    response = client.get('/movies/?imdb_id=tt1')
+    assert response.json()['results'][0] == dict(
+        movie_schema, imdb_id='tt1', imdb_rating='10.0', actors='Ian King',
+        runtime='120 min'
+    )
+
+
+def test_filter_comments_by_date(client, movie, different_movie):
+    for day, target in ((3, movie), (1, movie), (2, different_movie)):
+        comment = Comment.objects.create(text=f'day{day}', movie=target)
+        Comment.objects.filter(pk=comment.pk).update(
+            created_at=timezone.make_aware(datetime(2018, 1, day))
+        )
+
+    def texts(query):
+        response = client.get(f'/comments/?{query}')
+        assert response.status_code == 200
+        return [result['text'] for result in response.json()['results']]
+
+    assert texts('') == ['day1', 'day2', 'day3']
+    assert texts('ordering=-created_at') == ['day3', 'day2', 'day1']
+    assert texts(f'movie={movie.pk}&created_after=2018-01-02') == ['day3']
+    assert texts(
+        'created_after=2018-01-01T12:00:00Z&created_before=2018-01-03'
+    ) == ['day2']
+    assert client.get('/comments/?created_before=x').status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_comments_bulk(client, settings, movie, different_movie):
+    settings.COMMENTS_BULK_CHUNK_SIZE = 2
+    date_before = (datetime.now().date() + timedelta(days=1)).isoformat()
+    url = f'/top/?date_after=2017-01-01&date_before={date_before}'
+    client.get(url)
+    data = [
+        {'movie': movie.imdb_id, 'text': 'test1'},
+        {'movie': different_movie.imdb_id, 'text': 'test2'},
+        {'movie': different_movie.imdb_id, 'text': 'test3'}
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            '/comments/', data=json.dumps(data),
+            content_type='application/json'
+        )
+    assert response.status_code == 201
+    assert [
+        (item['movie'], item['text']) for item in response.json()
+    ] == [(item['movie'], item['text']) for item in data]
+    assert len([
+        query for query in queries
+        if query['sql'].startswith('SELECT "movies_movie"')
+    ]) == 1
+    assert len([
+        query for query in queries
+        if query['sql'].startswith('INSERT INTO "movies_comment"')
+    ]) == 2
+    response = client.get(url)
+    assert response['X-Cache'] == 'MISS'
+    assert response.json()[:2] == [
+        {'imdb_id': different_movie.imdb_id, 'total_comments': 2, 'rank': 1},
+        {'imdb_id': movie.imdb_id, 'total_comments': 1, 'rank': 2}
+    ]
+
+
+def test_post_comments_bulk_errors(client, settings, movie):
+    data = [
+        {'movie': movie.imdb_id, 'text': 'test1'},
+        {'movie': 'unknown', 'text': 'test2'},
+        {'movie': movie.imdb_id}
+    ]
+    response = client.post(
+        '/comments/', data=json.dumps(data), content_type='application/json'
+    )
+    assert response.status_code == 400
+    assert response.json() == [
+        {},
+        {'movie': ['Invalid pk "unknown" - object does not exist.']},
+        {'text': ['This field is required.']}
+    ]
+    assert not Comment.objects.exists()
+
+    settings.COMMENTS_BULK_MAX_ITEMS = 1
+    response = client.post(
+        '/comments/', data=json.dumps(data[:2]),
+        content_type='application/json'
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        'non_field_errors': ['Ensure this list has at most 1 items.']
+    }
+
+
+def test_movie_comment_count(client, movie, different_movie):
+    def comment_counts():
+        return dict(Movie.objects.values_list('pk', 'comment_count'))
+
+    comment = Comment.objects.create(text='test1', movie=movie)
+    Comment.objects.create(text='test2', movie=movie)
+    client.post(
+        '/comments/', data=json.dumps([
+            {'movie': different_movie.imdb_id, 'text': 'test3'},
+            {'movie': movie.imdb_id, 'text': 'test4'}
+        ]), content_type='application/json'
+    )
+    assert comment_counts() == {movie.pk: 3, different_movie.pk: 1}
+    comment.movie = different_movie
+    comment.save()
+    comment.text = 'edited'
+    comment.save()
+    assert comment_counts() == {movie.pk: 2, different_movie.pk: 2}
+    Comment.objects.filter(text='test2').delete()
+    assert comment_counts() == {movie.pk: 1, different_movie.pk: 2}
+
+    response = client.get('/movies/?ordering=-comment_count')
+    assert [
+        (result['imdb_id'], result['comment_count'])
+        for result in response.json()['results']
+    ] == [(different_movie.pk, 2), (movie.pk, 1)]
+
+    different_movie.delete()
+    assert comment_counts() == {movie.pk: 1}
+
+
+def _export_lines(response):
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode().splitlines()
+
+
+def test_export_movies(client, settings, movie, different_movie, movie_schema):
+    settings.EXPORT_CHUNK_SIZE = 1
+    Movie.objects.filter(pk=movie.pk).update(
+        updated_at=timezone.now() + timedelta(minutes=1)
+    )
+    response = client.get('/movies/export/')
+    assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+    rows = [json.loads(line) for line in _export_lines(response)]
+    # Ordered by updated_at, the incremental cutoff.
+    assert [row['imdb_id'] for row in rows] == [different_movie.pk, movie.pk]
+    updated_at = rows[1].pop('updated_at')
+    assert rows[1] == movie_schema
+
+    rows = _export_lines(client.get(
+        '/movies/export/', {'modified_since': updated_at}
+    ))
+    assert [json.loads(row)['imdb_id'] for row in rows] == [movie.pk]
+    rows = _export_lines(client.get(
+        '/movies/export/', {'imdb_id': different_movie.pk}
+    ))
+    assert [json.loads(row)['imdb_id'] for row in rows] == [different_movie.pk]
+
+    response = client.get('/movies/export/', {'modified_since': 'yesterday'})
+    assert response.status_code == 400
+    assert 'modified_since' in json.loads(response.content)
+
+
+def test_export_comments_csv(client, movie, different_movie, comments):
+    response = client.get(
+        '/comments/export/', {'format': 'csv', 'movie': different_movie.pk}
+    )
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    lines = _export_lines(response)
+    assert lines[0] == 'id,movie,created_at,updated_at,text'
+    assert [
+        (line.split(',')[1], line.split(',')[4]) for line in lines[1:]
+    ] == [(different_movie.pk, 'test2'), (different_movie.pk, 'test3')]
+
+
+def test_new_comment_updates_movie(client, movie):
+    updated_at = movie.updated_at
+    Comment.objects.create(text='test', movie=movie)
+    movie.refresh_from_db()
+    assert movie.updated_at > updated_at
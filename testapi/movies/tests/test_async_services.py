@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from aiohttp import web
+from aiohttp import test_utils
+from asgiref.testing import ApplicationCommunicator
+from django.core.signals import request_finished
+from django.db import connections
+
+from movies import (
+    OmdbApiException, OmdbApiUnavailable, async_services, services
+)
+from movies.db.pool import close_pools
+from movies.models import Movie
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def omdb_server(loop, settings, external_movie_schema):
+    """Stub OMDb api served from its own event loop in a thread."""
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.query))
+        if request.query.get('t') == 'Limited':
+            return web.json_response(
+                {'Response': 'False', 'Error': 'Request limit reached!'},
+                status=401
+            )
+        if request.query.get('t') == 'Unknown':
+            return web.json_response(
+                {'Response': 'False', 'Error': 'Movie not found!'}
+            )
+        return web.json_response(external_movie_schema)
+
+    server_loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = test_utils.TestServer(app, loop=server_loop)
+    server_loop.run_until_complete(server.start_server(loop=server_loop))
+    thread = threading.Thread(target=server_loop.run_forever)
+    thread.start()
+    settings.OMDB_API_URL = str(server.make_url('/'))
+    yield requests
+    loop.run_until_complete(async_services.close_async_client())
+    server_loop.call_soon_threadsafe(server_loop.stop)
+    thread.join()
+    server_loop.run_until_complete(server.close())
+    server_loop.close()
+
+
+def test_fetch_movie_async(loop, omdb_server):
+    data = loop.run_until_complete(
+        async_services.fetch_movie_omdapi_async('TestMovie')
+    )
+    assert data['imdb_id'] == 'tt2357596'
+    assert data['genre'] == ['Action', 'Sci-Fi']
+    assert omdb_server[0]['t'] == 'TestMovie'
+    assert services.fetch_movie_omdapi('testmovie') == data
+    assert len(omdb_server) == 1
+
+
+def test_fetch_movie_async_not_found(loop, omdb_server):
+    with pytest.raises(OmdbApiException, match='Movie not found!'):
+        loop.run_until_complete(
+            async_services.fetch_movie_omdapi_async('Unknown')
+        )
+
+
+def test_fetch_movie_async_rejected(loop, omdb_server):
+    with pytest.raises(OmdbApiUnavailable, match='Request limit reached!'):
+        loop.run_until_complete(
+            async_services.fetch_movie_omdapi_async('Limited')
+        )
+    assert services.get_client().circuit_breaker.failures == 1
+    _, key = services.omdb_lookup('Limited')
+    assert services.get_cached_movie(key) is None
+
+
+@pytest.mark.django_db
+def test_import_movies_asyncio_backend(omdb_server, settings):
+    settings.OMDB_IMPORT_BACKEND = 'asyncio'
+    results = services.import_movies(['TestMovie', 'Unknown'])
+    assert results == [
+        {'query': 'TestMovie', 'status': 'created', 'imdb_id': 'tt2357596'},
+        {'query': 'Unknown', 'status': 'error', 'error': 'Movie not found!'}
+    ]
+    assert Movie.objects.filter(pk='tt2357596').exists()
+
+
+def run_asgi(loop, path, query_string=b''):
+    from testapi.asgi import application
+
+    communicator = ApplicationCommunicator(application, {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET',
+        'path': path, 'query_string': query_string,
+        'headers': [(b'host', b'testserver')]
+    })
+    loop.run_until_complete(communicator.send_input({
+        'type': 'http.request', 'body': b''
+    }))
+    start = loop.run_until_complete(communicator.receive_output(5))
+    body = b''
+    while True:
+        message = loop.run_until_complete(communicator.receive_output(5))
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return start, body
+
+
+# Requests are served from a thread of the event loop's executor.
+@pytest.mark.django_db(transaction=True)
+def test_asgi_application(loop):
+    start, body = run_asgi(loop, '/top/', b'date_after=2017-01-01')
+    assert start['status'] == 400
+    assert json.loads(body) == {'date_before': ['This field is required.']}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_application_releases_connection(loop, monkeypatch, movie):
+    monkeypatch.setitem(connections.databases, 'default', dict(
+        connections.databases['default'], CONN_MAX_AGE=0,
+        POOL={'SIZE': 1, 'OVERFLOW': 0, 'TIMEOUT': 1}
+    ))
+    pools = []
+
+    def finished(**kwargs):
+        pools.append(connections['default'].pool)
+
+    # A fresh pool, not shared with the test's own connection.
+    close_pools()
+    request_finished.connect(finished)
+    try:
+        start, body = run_asgi(loop, '/movies/')
+        pool, = pools
+        stats = pool.stats()
+    finally:
+        request_finished.disconnect(finished)
+        close_pools()
+    assert start['status'] == 200
+    assert json.loads(body)['results'][0]['imdb_id'] == movie.pk
+    assert stats['open'] == 1
+    assert stats['in_use'] == 0
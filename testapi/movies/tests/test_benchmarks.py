@@ -0,0 +1,23 @@
+import pytest
+from django.db.models import F
+
+from benchmarks import bench_comments, data
+from movies.models import Comment, DailyCommentCount, Movie
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_generate():
+    data.generate(movies=20, comments=200)
+    assert Movie.objects.count() == 20
+    assert Comment.objects.count() == 200
+    assert not Comment.objects.exclude(updated_at=F('created_at')).exists()
+    assert Movie.objects.get(pk=data.movie_id(0)).comment_count > 0
+    assert DailyCommentCount.objects.exists()
+
+
+def test_bench_comments(capsys):
+    bench_comments.bench(movies=50, comments=100, repeat=1)
+    assert 'inserted 100 comments' in capsys.readouterr().out
+    assert Comment.objects.count() == 100
@@ -0,0 +1,95 @@
+import csv
+import json
+
+import pytest
+import responses
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+from movies.models import Comment, DailyCommentCount, Movie
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_import_movies(tmpdir, capsys, external_movie_schema):
+    titles = tmpdir.join('titles.txt')
+    titles.write('TestMovie\nTestMovie\n\n')
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&t=TestMovie'
+            ),
+            body=json.dumps(external_movie_schema),
+            status=200,
+            content_type='application/json'
+        )
+        call_command('import_movies', str(titles), concurrency=2)
+    assert 'TestMovie: created (tt2357596)' in capsys.readouterr().out
+    assert Movie.objects.filter(pk='tt2357596').exists()
+
+
+def test_rebuild_comment_counts(movie):
+    comment = Comment.objects.create(text='test', movie=movie)
+    Comment.objects.create(text='test', movie=movie)
+    DailyCommentCount.objects.all().delete()
+    call_command('rebuild_comment_counts')
+    counts = DailyCommentCount.objects.get()
+    assert counts.movie == movie
+    assert counts.day == comment.created_at.date()
+    assert counts.comment_count == 2
+
+
+def test_reconcile_comment_counts(capsys, movie, movie_schema):
+    other_movie = Movie.objects.create(**dict(movie_schema, imdb_id='tt1'))
+    Comment.objects.create(text='test', movie=movie)
+    Comment.objects.create(text='test', movie=movie)
+    Movie.objects.update(comment_count=5)
+    call_command('reconcile_comment_counts', chunk_size=1)
+    assert 'of 2 movies corrected' in capsys.readouterr().out
+    assert dict(Movie.objects.values_list('pk', 'comment_count')) == {
+        movie.pk: 2, other_movie.pk: 0
+    }
+
+
+def test_export(tmpdir, capsys, movie, movie_schema):
+    Movie.objects.create(**dict(
+        movie_schema, imdb_id='tt1', genre=['Drama'], plot='Line\nbreak'
+    ))
+    output = tmpdir.join('movies.csv')
+    call_command(
+        'export', 'movies', format='csv', output=str(output),
+        filter=['genre=Drama']
+    )
+    with open(str(output), newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [(row['imdb_id'], row['plot']) for row in rows] == [
+        ('tt1', 'Line\nbreak')
+    ]
+    assert json.loads(rows[0]['genre']) == ['Drama']
+
+    call_command(
+        'export', 'comments', modified_since='2000-01-01'
+    )
+    assert capsys.readouterr().out == ''
+    comment = Comment.objects.create(text='test', movie=movie)
+    call_command('export', 'comments', modified_since='2000-01-01')
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['text'] for line in lines] == ['test']
+
+    # Edits of old comments are exported too.
+    Comment.objects.update(
+        created_at='2001-01-01T00:00Z', updated_at='2001-01-01T00:00Z'
+    )
+    call_command('export', 'comments', modified_since='2010-01-01')
+    assert capsys.readouterr().out == ''
+    comment.text = 'edited'
+    comment.save()
+    call_command('export', 'comments', modified_since='2010-01-01')
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['text'] for line in lines] == ['edited']
+
+    with pytest.raises(CommandError):
+        call_command('export', 'movies', filter=['year=never'])
@@ -0,0 +1,109 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+import responses
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from movies.models import Comment, DailyCommentCount, Movie
+
+
+# Versions are bumped when the transaction commits.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def different_movie(movie_schema):
+    return Movie.objects.create(**dict(movie_schema, imdb_id='different'))
+
+
+def test_movies_not_modified(client, movie):
+    response = client.get('/movies/')
+    assert response.status_code == 200
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/movies/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert len(queries) == 0
+    response = client.get(
+        '/movies/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == 304
+    assert client.get(
+        '/movies/?page_size=1', HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200
+
+    Comment.objects.create(text='test', movie=movie)
+    response = client.get('/movies/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert response.json()['results'][0]['comment_count'] == 1
+
+
+def test_comments_not_modified_per_movie(client, movie, different_movie):
+    url = f'/comments/?movie={movie.pk}'
+    etag = client.get(url)['ETag']
+    Comment.objects.create(text='test', movie=different_movie)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(
+        '/comments/', HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200
+    Comment.objects.create(text='test', movie=movie)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert [item['text'] for item in response.json()['results']] == ['test']
+
+
+def test_top_movies_not_modified(client, movie):
+    date_before = (date.today() + timedelta(days=1)).isoformat()
+    url = f'/top/?date_after=2017-01-01&date_before={date_before}'
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    Comment.objects.create(text='test', movie=movie)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()[0]['total_comments'] == 1
+
+
+def test_rebuild_comment_counts_invalidates(client, movie):
+    Comment.objects.create(text='test', movie=movie)
+    DailyCommentCount.objects.update(comment_count=5)
+    date_before = (date.today() + timedelta(days=1)).isoformat()
+    url = f'/top/?date_after=2017-01-01&date_before={date_before}'
+    response = client.get(url)
+    assert response.json()[0]['total_comments'] == 5
+    call_command('rebuild_comment_counts')
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 200
+    assert response['X-Cache'] == 'MISS'
+    assert response.json()[0]['total_comments'] == 1
+
+
+def test_bulk_import_invalidates(client, movie, external_movie_schema):
+    date_before = (date.today() + timedelta(days=1)).isoformat()
+    top_url = f'/top/?date_after=2017-01-01&date_before={date_before}'
+    assert len(client.get(top_url).json()) == 1
+    etag = client.get('/movies/')['ETag']
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&i=tt0000001'
+            ),
+            json=dict(external_movie_schema, imdbID='tt0000001', Title='New')
+        )
+        client.post(
+            '/movies/bulk/', data=json.dumps({'titles': ['tt0000001']}),
+            content_type='application/json'
+        )
+    response = client.get(top_url)
+    assert response['X-Cache'] == 'MISS'
+    assert len(response.json()) == 2
+    assert client.get(
+        '/movies/', HTTP_IF_NONE_MATCH=etag
+    ).status_code == 200
@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from psycopg2 import extensions
+
+from movies.db.base import DatabaseWrapper
+from movies.db.pool import ConnectionPool, PoolTimeout, close_pools
+from movies.metrics import registry
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(FakeConnection, size=2)
+    connection = pool.acquire()
+    connection.status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.release(connection)
+    assert connection.status == extensions.TRANSACTION_STATUS_IDLE
+    assert pool.acquire() is connection
+    stats = pool.stats()
+    assert (stats['connected'], stats['reused'], stats['in_use']) == (1, 1, 1)
+
+
+def test_pool_overflow_and_timeout():
+    pool = ConnectionPool(FakeConnection, size=1, overflow=1, timeout=0.01)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    # Connections above size are closed on release.
+    assert second.closed and not first.closed
+    stats = pool.stats()
+    assert (stats['open'], stats['idle'], stats['timeouts']) == (1, 1, 1)
+
+
+def test_pool_recycles_and_checks_connections():
+    pool = ConnectionPool(FakeConnection, recycle=0)
+    stale = pool.acquire()
+    pool.release(stale)
+    assert stale.closed
+    assert pool.stats()['recycled'] == 1
+
+    pool = ConnectionPool(FakeConnection, check=lambda connection: False)
+    broken = pool.acquire()
+    pool.release(broken)
+    assert pool.acquire() is not broken
+    assert broken.closed
+    assert pool.stats()['discarded'] == 1
+
+
+@pytest.fixture
+def pooled_wrapper():
+    wrapper = DatabaseWrapper(dict(
+        connection.settings_dict, CONN_HEALTH_CHECKS=True,
+        POOL={'SIZE': 1, 'OVERFLOW': 0, 'TIMEOUT': 1}
+    ), alias='pooled')
+    yield wrapper
+    wrapper.close()
+    close_pools()
+
+
+@pytest.mark.django_db
+def test_pooled_backend(pooled_wrapper, client):
+    with pooled_wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    raw_connection = pooled_wrapper.connection
+    pooled_wrapper.close()
+    assert not raw_connection.closed
+    with pooled_wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    assert pooled_wrapper.connection is raw_connection
+    assert pooled_wrapper.pool.stats()['reused'] == 1
+
+    registry.reset()
+    metrics = client.get('/metrics/').content.decode()
+    assert (
+        'movies_db_pool_connections{alias="pooled",state="in_use"} 1'
+        in metrics
+    )
+    assert (
+        'movies_db_pool_acquisitions_total'
+        '{alias="pooled",result="reused"} 1' in metrics
+    )
+
+
+@pytest.mark.django_db
+def test_health_check_replaces_lost_connection():
+    wrapper = DatabaseWrapper(
+        dict(connection.settings_dict, CONN_HEALTH_CHECKS=True)
+    )
+    try:
+        wrapper.ensure_connection()
+        lost = wrapper.connection
+        lost.close()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        assert wrapper.connection is not lost
+    finally:
+        wrapper.close()
@@ -0,0 +1,54 @@
+from datetime import datetime
+from itertools import combinations, islice
+
+import pytest
+from django.utils import timezone
+
+from movies import fast_serializers, serializers
+from movies.models import Comment, Movie
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def catalogue(movie, movie_schema):
+    Movie.objects.create(**dict(
+        movie_schema, imdb_id='tt0', genre=[], ratings={'nested': [1, None]}
+    ))
+    comment = Comment.objects.create(text='test1', movie=movie)
+    comment.created_at = datetime(2015, 6, 1, 12, 30, 15, 123, timezone.utc)
+    comment.save()
+    Comment.objects.create(text='test2', movie=movie)
+
+
+@pytest.mark.usefixtures('catalogue')
+@pytest.mark.parametrize('url', [
+    '/movies/',
+    '/movies/?ordering=-year&page_size=1&page=2',
+    '/movies/?representation=summary',
+    '/movies/?cursor=&page_size=1&ordering=title&fields=imdb_id',
+    '/comments/',
+    '/comments/?movie=tt2357596&page_size=1',
+])
+def test_fast_list_output_is_identical(client, settings, url):
+    settings.FAST_LIST_SERIALIZATION = False
+    expected = client.get(url).content
+    settings.FAST_LIST_SERIALIZATION = True
+    assert client.get(url).content == expected
+
+
+@pytest.mark.parametrize('serializer_class', [
+    serializers.MovieSerializer, serializers.CommentSerializer
+])
+def test_serializers_have_fast_path(serializer_class):
+    columns = fast_serializers.get_columns(serializer_class)
+    assert [name for name, _, _ in columns] == list(serializer_class().fields)
+
+
+def test_compiled_field_selections_are_bounded():
+    names = list(serializers.MovieSerializer().fields)
+    for fields in islice(combinations(names, 2), 300):
+        fast_serializers.get_columns(serializers.MovieSerializer, fields)
+    info = fast_serializers._get_compiled.cache_info()
+    assert info.currsize <= info.maxsize < 300
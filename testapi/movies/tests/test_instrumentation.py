@@ -0,0 +1,113 @@
+import logging
+
+import pytest
+import responses
+from django.conf import settings
+
+from movies import instrumentation
+from movies.metrics import Registry, registry
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    registry.reset()
+
+
+def _server_timing(response):
+    return dict(
+        item.strip().split(';', 1)
+        for item in response['Server-Timing'].split(',')
+    )
+
+
+@pytest.mark.usefixtures('movie')
+def test_server_timing(client):
+    timing = _server_timing(client.get('/movies/'))
+    assert set(timing) == {'db', 'upstream', 'serialization', 'total'}
+    assert 'desc="0 requests"' in timing['upstream']
+    assert 'desc="0 queries"' not in timing['db']
+
+
+def test_upstream_timing(client, external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&t=TestMovie'
+            ),
+            json=external_movie_schema
+        )
+        response = client.post('/movies/', data={'title': 'TestMovie'})
+    assert 'desc="1 requests"' in _server_timing(response)['upstream']
+    metrics = client.get('/metrics/').content.decode()
+    assert 'movies_upstream_requests_total{view="movies"} 1' in metrics
+
+
+@pytest.mark.usefixtures('movie')
+def test_metrics_endpoint(client):
+    client.get('/movies/')
+    client.get('/movies/')
+    client.get('/missing/')
+    response = client.get('/metrics/')
+    assert response['Content-Type'].startswith('text/plain')
+    metrics = response.content.decode()
+    assert '# TYPE movies_http_requests_total counter' in metrics
+    assert (
+        'movies_http_requests_total'
+        '{method="GET",status="200",view="movies"} 2'
+    ) in metrics
+    assert (
+        'movies_http_requests_total'
+        '{method="GET",status="404",view="unmatched"} 1'
+    ) in metrics
+    assert (
+        'movies_http_request_duration_seconds_bucket'
+        '{method="GET",view="movies",le="+Inf"} 2'
+    ) in metrics
+
+
+def test_query_budget_warning(client, settings, caplog, movie):
+    settings.INSTRUMENTATION_QUERY_BUDGETS = {'comments': 0}
+    with caplog.at_level(logging.WARNING, logger='movies.instrumentation'):
+        client.get('/comments/')
+        client.get('/movies/')
+    assert [record.getMessage() for record in caplog.records] == [
+        'GET comments ran 2 queries, the budget is 0.'
+    ]
+    metrics = client.get('/metrics/').content.decode()
+    assert 'movies_query_budget_exceeded_total{view="comments"} 1' in metrics
+
+
+def test_repeated_query_warning(settings, caplog):
+    settings.INSTRUMENTATION_REPEATED_QUERY_THRESHOLD = 3
+    stats = instrumentation.RequestStats()
+    for _ in range(3):
+        stats.add_query('SELECT 1 FROM movies_comment WHERE id = %s', 0.001)
+    stats.add_query('SELECT 2', 0.001)
+    with caplog.at_level(logging.WARNING, logger='movies.instrumentation'):
+        instrumentation.record_request('top', 'GET', 200, stats, 0.01)
+    assert [record.getMessage() for record in caplog.records] == [
+        'GET top ran the same query 3 times, possible N+1: '
+        'SELECT 1 FROM movies_comment WHERE id = %s'
+    ]
+
+
+def test_histogram_rendering():
+    metrics = Registry()
+    metrics.histogram('duration_seconds', 'Durations.', buckets=(0.1, 1))
+    metrics.observe('duration_seconds', 0.05, {'view': 'a"b'})
+    metrics.observe('duration_seconds', 0.5, {'view': 'a"b'})
+    metrics.observe('duration_seconds', 5, {'view': 'a"b'})
+    assert metrics.render().splitlines() == [
+        '# HELP duration_seconds Durations.',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{view="a\\"b",le="0.1"} 1',
+        'duration_seconds_bucket{view="a\\"b",le="1.0"} 2',
+        'duration_seconds_bucket{view="a\\"b",le="+Inf"} 3',
+        'duration_seconds_sum{view="a\\"b"} 5.55',
+        'duration_seconds_count{view="a\\"b"} 3',
+    ]
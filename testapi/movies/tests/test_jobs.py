@@ -0,0 +1,75 @@
+import json
+
+import pytest
+import responses
+from django.conf import settings
+from django.core.management import call_command
+
+from movies import jobs
+from movies.management.commands import run_ingestion_worker
+from movies.models import IngestionJob
+
+
+@pytest.fixture
+def thread_backend(settings):
+    settings.MOVIES_INGESTION_BACKEND = 'movies.jobs.ThreadBackend'
+    backend = jobs.get_backend()
+    yield backend
+    backend.join()
+
+
+@pytest.fixture
+def omdb_mock(external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET,
+            (
+                f'http://www.omdbapi.com/'
+                f'?apikey={settings.MOVIES_API_KEY}&t=TestMovie'
+            ),
+            body=json.dumps(external_movie_schema),
+            status=200,
+            content_type='application/json'
+        )
+        yield requests_mock
+
+
+@pytest.mark.django_db(transaction=True)
+def test_background_fetch_movies(
+        client, thread_backend, omdb_mock, movie_schema):
+    response = client.post(
+        '/movies/', data={'title': 'TestMovie', 'background': 'true'}
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job['status'] in (IngestionJob.PENDING, IngestionJob.RUNNING)
+    assert response['Location'] == job['url']
+    thread_backend.join()
+
+    response = client.get(job['url'])
+    assert response.json()['status'] == IngestionJob.DONE
+    assert response.json()['movie'] == movie_schema
+    assert len(omdb_mock.calls) == 1
+
+
+@pytest.mark.django_db
+def test_enqueue_coalesces_active_jobs():
+    job, created = jobs.enqueue('TestMovie')
+    assert created
+    assert jobs.enqueue(' testmovie') == (job, False)
+    job.status = IngestionJob.DONE
+    job.save()
+    assert jobs.enqueue('TestMovie')[1]
+
+
+@pytest.mark.django_db
+def test_run_ingestion_worker(omdb_mock, monkeypatch):
+    # Would drop the connection of the test transaction.
+    monkeypatch.setattr(
+        run_ingestion_worker, 'close_old_connections', lambda: None
+    )
+    job, _ = jobs.enqueue('TestMovie')
+    call_command('run_ingestion_worker', once=True)
+    job.refresh_from_db()
+    assert job.status == IngestionJob.DONE
+    assert job.movie_id == 'tt2357596'
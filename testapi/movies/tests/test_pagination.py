@@ -0,0 +1,125 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from movies import pagination
+from movies.models import Comment, Movie
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def movies(movie_schema):
+    return [
+        Movie.objects.create(**dict(movie_schema, imdb_id=f'tt{i}'))
+        for i in range(3)
+    ]
+
+
+def test_keyset_pagination_comments(client, movie):
+    for i in range(3):
+        Comment.objects.create(text=f'test{i}', movie=movie)
+    response = client.get('/comments/?cursor=&page_size=2')
+    data = response.json()
+    assert 'count' not in data
+    assert [it['text'] for it in data['results']] == ['test0', 'test1']
+    data = client.get(data['next']).json()
+    assert [it['text'] for it in data['results']] == ['test2']
+    assert data['next'] is None
+
+
+def test_keyset_pagination_movies_ordering(client, movies):
+    response = client.get('/movies/?cursor=&page_size=2&ordering=-imdb_id')
+    data = response.json()
+    assert [it['imdb_id'] for it in data['results']] == ['tt2', 'tt1']
+    data = client.get(data['next']).json()
+    assert [it['imdb_id'] for it in data['results']] == ['tt0']
+
+
+def _follow(client, url, link='next'):
+    pages = []
+    while url:
+        data = client.get(url).json()
+        pages.append([it['imdb_id'] for it in data['results']])
+        url = data[link]
+    return pages
+
+
+@pytest.mark.parametrize('ordering, expected', [
+    ('year', ['tt0', 'tt1', 'tt2']),
+    ('-year', ['tt2', 'tt1', 'tt0']),
+    ('imdb_rating', ['tt2', 'tt0', 'tt1']),
+    ('-imdb_rating', ['tt1', 'tt0', 'tt2']),
+])
+def test_keyset_pagination_ties_and_nulls(client, movies, ordering, expected):
+    # Every movie has the same year, tt1 has no rating.
+    Movie.objects.filter(pk='tt0').update(imdb_rating_value=7)
+    Movie.objects.filter(pk='tt2').update(imdb_rating_value=5)
+    url = f'/movies/?cursor=&page_size=1&ordering={ordering}'
+    with CaptureQueriesContext(connection) as queries:
+        pages = _follow(client, url)
+    assert pages == [[imdb_id] for imdb_id in expected]
+    assert not any('OFFSET' in query['sql'] for query in queries)
+
+
+@pytest.mark.usefixtures('movies')
+def test_keyset_pagination_previous(client):
+    data = client.get('/movies/?cursor=&page_size=2&ordering=year').json()
+    data = client.get(data['next']).json()
+    assert [it['imdb_id'] for it in data['results']] == ['tt2']
+    assert _follow(client, data['previous'], 'previous') == [['tt0', 'tt1']]
+
+
+@pytest.mark.usefixtures('movies')
+def test_keyset_pagination_search(client):
+    response = client.get('/movies/?cursor=&search=twisted')
+    assert response.status_code == 400
+    assert 'cursor' in response.json()
+    data = client.get('/movies/?cursor=&search=twisted&ordering=-imdb_id')
+    assert [it['imdb_id'] for it in data.json()['results']] == [
+        'tt2', 'tt1', 'tt0'
+    ]
+
+
+def test_keyset_pagination_invalid_cursor(client):
+    response = client.get('/movies/?cursor=cD0lNUIxJTVE&ordering=year')
+    assert response.status_code == 404
+
+
+@pytest.mark.usefixtures('movies')
+def test_page_number_pagination_is_default(client):
+    data = client.get('/movies/?page=2&page_size=2').json()
+    assert data['count'] == 3
+    assert [it['imdb_id'] for it in data['results']] == ['tt2']
+
+
+@pytest.mark.usefixtures('movies')
+def test_estimated_count(client, settings, monkeypatch):
+    settings.PAGINATION_ESTIMATE_THRESHOLD = 1000
+    monkeypatch.setattr(pagination, 'estimate_row_count', lambda qs: 12345)
+    data = client.get('/movies/?page_size=2').json()
+    assert data['count'] == 12345
+    assert data['count_is_exact'] is False
+    data = client.get('/movies/?page=2&page_size=2').json()
+    assert [it['imdb_id'] for it in data['results']] == ['tt2']
+    assert data['next'] is None
+    assert client.get('/movies/?page=3&page_size=2').status_code == 404
+
+
+@pytest.mark.usefixtures('movies')
+def test_small_table_count_is_exact(client):
+    data = client.get('/movies/').json()
+    assert data['count'] == 3
+    assert data['count_is_exact'] is True
+
+
+def test_capped_count(client, settings, movie):
+    settings.PAGINATION_COUNT_CAP = 2
+    for i in range(3):
+        Comment.objects.create(text=f'test{i}', movie=movie)
+    data = client.get(f'/comments/?movie={movie.pk}&page_size=1').json()
+    assert data['count'] == 2
+    assert data['count_is_exact'] is False
+    data = client.get(f'/comments/?movie={movie.pk}&page=3&page_size=1').json()
+    assert [it['text'] for it in data['results']] == ['test2']
@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+
+from movies.filters import CommentFilterSet, MovieFilterSet
+from movies.models import Comment, Movie
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def no_seqscan():
+    # The test table is tiny, make the planner pick an index if it can.
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+
+@pytest.fixture
+def no_sort():
+    # A sort still shows up in the plan if no index provides the order.
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_sort = off')
+
+
+@pytest.mark.usefixtures('no_seqscan')
+@pytest.mark.parametrize('query, index', [
+    ({'genre': 'Sci-Fi'}, 'movies_movi_genre_5928d8_gin'),
+    ({'genre__overlap': 'Action,Drama'}, 'movies_movi_genre_5928d8_gin'),
+    ({'language': 'French'}, 'movies_movi_languag_6ff5d7_gin'),
+    ({'country__overlap': 'UK'}, 'movies_movi_country_72017c_gin'),
+    ({'year__gte': '2000'}, 'movies_movi_year_82d175_idx'),
+    ({'metascore__lte': '50'}, 'movies_movi_metasco_a7c695_idx'),
+    ({'imdb_votes__gte': '1000'}, 'movies_movi_imdb_vo_9e0c36_idx'),
+])
+def test_movie_filters_use_index(query, index):
+    queryset = MovieFilterSet(query, queryset=Movie.objects.all()).qs
+    assert index in queryset.explain()
+
+
+@pytest.mark.usefixtures('movie', 'no_seqscan', 'no_sort')
+@pytest.mark.parametrize('query, index', [
+    ({'movie': 'tt2357596'}, 'movies_comm_movie_i_0a8795_idx'),
+    ({'created_after': '2018-01-01'}, 'movies_comm_created_38e8ea_idx'),
+])
+def test_comment_filters_use_index(query, index):
+    queryset = CommentFilterSet(
+        query, queryset=Comment.objects.order_by('created_at', 'pk')
+    ).qs
+    plan = queryset[:10].explain()
+    assert index in plan
+    assert 'Sort' not in plan
@@ -0,0 +1,179 @@
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+import pytest
+from django.conf import settings
+from django.db import connections
+
+from movies import routers
+from movies.models import Comment, Movie
+
+
+@pytest.fixture(autouse=True)
+def unpin():
+    # Writes of earlier tests outside of requests pin the thread.
+    routers.pin(False)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+
+
+@pytest.fixture
+def lagging_replica(settings):
+    """Replica reading from a snapshot of the primary.
+
+    Calling it takes the snapshot, later writes stay invisible to the
+    replica as if replication was lagging behind.
+    """
+    connections.databases['lagging'] = dict(
+        connections['default'].settings_dict
+    )
+    settings.DATABASE_REPLICAS = ['lagging']
+    replica = connections['lagging']
+
+    def freeze():
+        with replica.cursor() as cursor:
+            cursor.execute('BEGIN ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SELECT 1')
+
+    yield freeze
+    with replica.cursor() as cursor:
+        cursor.execute('ROLLBACK')
+    replica.close()
+    del connections['lagging']
+    del connections.databases['lagging']
+
+
+@pytest.mark.usefixtures('replicas')
+def test_replica_reads_round_robin():
+    assert Movie.objects.all().db == 'default'
+    aliases = []
+    for _ in range(4):
+        with routers.replica_reads():
+            aliases.append(Movie.objects.all().db)
+            assert Comment.objects.all().db == aliases[-1]
+    assert sorted(aliases) == [
+        'replica1', 'replica1', 'replica2', 'replica2'
+    ]
+    assert aliases[0] != aliases[1]
+    assert Movie.objects.all().db == 'default'
+
+
+def test_without_replicas_reads_from_primary(settings):
+    settings.DATABASE_REPLICAS = []
+    with routers.replica_reads() as replica:
+        assert replica is None
+        assert Movie.objects.all().db == 'default'
+
+
+@pytest.mark.usefixtures('replicas')
+def test_write_pins_reads_to_primary():
+    try:
+        with routers.replica_reads():
+            routers.ReplicaRouter().db_for_write(Movie)
+            assert routers.wrote()
+            assert Movie.objects.all().db == 'default'
+    finally:
+        routers.pin(False)
+    assert not routers.wrote()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('replicas')
+def test_transaction_reads_from_primary():
+    with routers.replica_reads():
+        assert Movie.objects.all().db == 'default'
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('replicas')
+def test_write_sets_pin_cookie(client, movie):
+    response = client.get('/movies/')
+    assert settings.REPLICA_PIN_COOKIE not in response.cookies
+    response = client.post(
+        '/comments/', data={'movie': movie.imdb_id, 'text': 'test'}
+    )
+    assert response.status_code == 201
+    cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+    assert cookie['max-age'] == settings.REPLICA_PIN_SECONDS
+    assert not routers.is_pinned()
+
+
+@pytest.mark.django_db
+def test_no_pin_cookie_without_replicas(client, settings, movie):
+    settings.DATABASE_REPLICAS = []
+    response = client.post(
+        '/comments/', data={'movie': movie.imdb_id, 'text': 'test'}
+    )
+    assert settings.REPLICA_PIN_COOKIE not in response.cookies
+
+
+@pytest.mark.skipif(
+    not settings.DATABASE_REPLICAS,
+    reason='needs DATABASE_REPLICA_HOSTS, e.g. the primary host twice'
+)
+@pytest.mark.django_db(transaction=True)
+def test_replica_routing(client, settings, movie):
+    queries = {alias: [] for alias in settings.DATABASES}
+    pin_seconds = settings.REPLICA_PIN_SECONDS
+    # The movie was just created, lists would read from the primary.
+    settings.REPLICA_PIN_SECONDS = 0
+
+    def recorder(alias):
+        def record(execute, sql, params, many, context):
+            queries[alias].append(sql)
+            return execute(sql, params, many, context)
+        return record
+
+    with ExitStack() as stack:
+        for alias in settings.DATABASES:
+            stack.enter_context(
+                connections[alias].execute_wrapper(recorder(alias))
+            )
+        assert client.get('/movies/').json()['results']
+        response = client.get(f'/comments/?movie={movie.imdb_id}')
+        assert response.status_code == 200
+        replica_queries = sum(
+            len(queries[alias]) for alias in settings.DATABASE_REPLICAS
+        )
+        assert replica_queries >= 4
+        assert not queries['default']
+
+        settings.REPLICA_PIN_SECONDS = pin_seconds
+        client.post(
+            '/comments/', data={'movie': movie.imdb_id, 'text': 'test'}
+        )
+        for alias in queries:
+            queries[alias].clear()
+        response = client.get(f'/comments/?movie={movie.imdb_id}')
+        assert response.json()['count'] == 1
+        assert queries['default']
+        assert not any(
+            queries[alias] for alias in settings.DATABASE_REPLICAS
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recent_changes_are_not_read_from_lagging_replica(
+        client, settings, lagging_replica, movie):
+    date_before = (date.today() + timedelta(days=1)).isoformat()
+    top_url = f'/top/?date_after=2017-01-01&date_before={date_before}'
+    lagging_replica()
+    Comment.objects.create(text='test', movie=movie)
+
+    response = client.get('/movies/')
+    assert response.json()['results'][0]['comment_count'] == 1
+    assert client.get(
+        '/movies/', HTTP_IF_NONE_MATCH=response['ETag']
+    ).status_code == 304
+    assert client.get(top_url).json()[0]['total_comments'] == 1
+    response = client.get(top_url)
+    assert response['X-Cache'] == 'HIT'
+    assert response.json()[0]['total_comments'] == 1
+
+    # Once the change is older, the replica is read and still lags.
+    settings.REPLICA_PIN_SECONDS = 0
+    response = client.get('/movies/?page_size=1')
+    assert response.json()['results'][0]['comment_count'] == 0
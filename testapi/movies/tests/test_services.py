@@ -0,0 +1,260 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+import requests
+import responses
+from django.conf import settings
+from django.db import connection
+
+from movies import (
+    OmdbApiException, OmdbApiUnavailable, normalization, services
+)
+from movies.models import Credit, Movie
+
+
+OMDB_URL = f'http://www.omdbapi.com/?apikey={settings.MOVIES_API_KEY}'
+
+
+def test_fetch_movie_is_cached_by_normalized_title(external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=TestMovie',
+            body=json.dumps(external_movie_schema), status=200,
+            content_type='application/json'
+        )
+        first = services.fetch_movie_omdapi('TestMovie')
+        second = services.fetch_movie_omdapi('  testmovie ')
+        assert len(requests_mock.calls) == 1
+    assert first == second
+    assert first['imdb_id'] == 'tt2357596'
+
+
+def test_fetch_movie_is_cached_by_imdb_id(external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=TestMovie',
+            body=json.dumps(external_movie_schema), status=200,
+            content_type='application/json'
+        )
+        services.fetch_movie_omdapi('TestMovie')
+    data = services.fetch_movie_omdapi(imdb_id='tt2357596')
+    assert data['title'] == 'TestMovie'
+
+
+def test_movie_not_found_is_cached():
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=Unknown',
+            body='{"Response": "False", "Error": "Movie not found!"}',
+            status=200, content_type='application/json'
+        )
+        for _ in range(2):
+            with pytest.raises(OmdbApiException, match='Movie not found!'):
+                services.fetch_movie_omdapi('Unknown')
+        assert len(requests_mock.calls) == 1
+
+
+def test_other_errors_are_not_cached():
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&i=tt0',
+            body='{"Response": "False", "Error": "Incorrect IMDb ID."}',
+            status=200, content_type='application/json'
+        )
+        for _ in range(2):
+            with pytest.raises(OmdbApiException, match='Incorrect IMDb ID.'):
+                services.fetch_movie_omdapi(imdb_id='tt0')
+        assert len(requests_mock.calls) == 2
+
+
+@pytest.mark.parametrize('error', [
+    'Invalid API key!', 'Request limit reached!'
+])
+def test_rejected_request_is_unavailable(error):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=TestMovie',
+            json={'Response': 'False', 'Error': error}, status=401
+        )
+        for _ in range(2):
+            with pytest.raises(OmdbApiUnavailable, match=error):
+                services.fetch_movie_omdapi('TestMovie')
+        assert len(requests_mock.calls) == 2
+    assert services.get_client().circuit_breaker.failures == 2
+
+
+@pytest.fixture
+def omdb_client():
+    return services.OmdbClient(
+        api_key=settings.MOVIES_API_KEY, url='http://www.omdbapi.com/',
+        pool_size=1, connect_timeout=1, read_timeout=1, max_retries=0,
+        backoff_factor=0, failure_threshold=2, reset_timeout=60
+    )
+
+
+def test_omdb_client_circuit_breaker(omdb_client):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=TestMovie',
+            body=requests.ConnectionError()
+        )
+        for _ in range(3):
+            with pytest.raises(OmdbApiUnavailable):
+                omdb_client.get(t='TestMovie')
+        assert len(requests_mock.calls) == 2
+
+
+def test_omdb_client_server_error(omdb_client):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=TestMovie', status=503
+        )
+        with pytest.raises(OmdbApiUnavailable):
+            omdb_client.get(t='TestMovie')
+    assert omdb_client.circuit_breaker.failures == 1
+
+
+def test_circuit_breaker_half_open(monkeypatch):
+    breaker = services.CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 100)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 110)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request()
+
+
+def test_circuit_breaker_half_open_single_trial(monkeypatch):
+    breaker = services.CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 100)
+    breaker.record_failure()
+    breaker.record_failure()
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 110)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        allowed = list(executor.map(
+            lambda _: breaker.allow_request(), range(8)
+        ))
+    assert allowed.count(True) == 1
+    breaker.record_failure()
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 119)
+    assert not breaker.allow_request()
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 120)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    # A trial which never reports back does not keep the circuit open.
+    monkeypatch.setattr(services.time, 'monotonic', lambda: 130)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def _run_concurrently(function, count):
+    def run():
+        try:
+            return function()
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(run) for _ in range(count)]
+        return [future.result() for future in futures]
+
+
+def _slow_omdb_mock(requests_mock, external_movie_schema):
+    def callback(request):
+        time.sleep(0.2)
+        return 200, {}, json.dumps(external_movie_schema)
+
+    requests_mock.add_callback(
+        responses.GET, f'{OMDB_URL}&t=TestMovie', callback=callback,
+        content_type='application/json'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_movie_single_flight(external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        _slow_omdb_mock(requests_mock, external_movie_schema)
+        results = _run_concurrently(
+            lambda: services.ingest_movie('TestMovie'), 5
+        )
+        assert len(requests_mock.calls) == 1
+    assert {movie.pk for movie, _ in results} == {'tt2357596'}
+    assert sum(created for _, created in results) == 1
+    assert Movie.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_movie_advisory_lock(external_movie_schema):
+    # Bypasses the in-process coalescing like separate processes would.
+    with responses.RequestsMock() as requests_mock:
+        _slow_omdb_mock(requests_mock, external_movie_schema)
+        results = _run_concurrently(
+            lambda: services._ingest_movie_locked('TestMovie', False), 3
+        )
+        assert len(requests_mock.calls) == 1
+    assert sorted(created for _, created in results) == [False, False, True]
+
+
+@pytest.mark.parametrize('data, expected', [
+    (
+        {'imdb_rating': '5.9', 'runtime': '65 min', 'box_office': '$512,841'},
+        {
+            'imdb_rating_value': Decimal('5.9'), 'runtime_minutes': 65,
+            'box_office_amount': 512841
+        }
+    ),
+    (
+        {'imdb_rating': 'N/A', 'runtime': 'N/A', 'box_office': 'N/A'},
+        {
+            'imdb_rating_value': None, 'runtime_minutes': None,
+            'box_office_amount': None
+        }
+    ),
+])
+def test_typed_fields(data, expected):
+    assert normalization.typed_fields(data) == expected
+
+
+def test_parse_people():
+    assert normalization.parse_people(
+        'John Smith (screenplay), Ian King, John Smith (story), N/A'
+    ) == ['John Smith', 'Ian King']
+
+
+@pytest.mark.django_db
+def test_ingest_movie_normalizes_columns(external_movie_schema):
+    with responses.RequestsMock() as requests_mock:
+        requests_mock.add(
+            responses.GET, f'{OMDB_URL}&t=TestMovie',
+            json=external_movie_schema
+        )
+        movie, created = services.ingest_movie('TestMovie')
+    movie.refresh_from_db()
+    assert movie.imdb_rating_value == Decimal('5.9')
+    assert movie.runtime_minutes == 65
+    assert movie.box_office_amount == 512841
+    assert list(movie.credits.order_by('role', 'position').values_list(
+        'role', 'person__name'
+    )) == [
+        (Credit.ACTOR, 'Joseph Marshall'),
+        (Credit.ACTOR, 'Ian King'),
+        (Credit.DIRECTOR, 'Kowalski'),
+        (Credit.WRITER, 'John Smith')
+    ]
+
+
+@pytest.mark.django_db
+def test_get_stored_movie_prefers_most_voted(movie_schema):
+    for imdb_id, title, votes in [
+        ('tt1', 'Remake', 10), ('tt3', 'REMAKE', 30), ('tt2', 'remake', 30)
+    ]:
+        Movie.objects.create(**dict(
+            movie_schema, imdb_id=imdb_id, title=title, imdb_votes=votes
+        ))
+    assert services.get_stored_movie(' remake ').pk == 'tt2'
+    assert services.get_stored_movie('Unknown') is None
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+
+from movies import top_cache
+
+
+# Rankings are invalidated when the transaction commits.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(tmpdir, monkeypatch):
+    # Every call opens the file based cache anew, like another process
+    # sharing it would.
+    monkeypatch.setattr(
+        top_cache, '_get_cache', lambda: FileBasedCache(str(tmpdir), {})
+    )
+
+
+def cache(date_range, result, short=False):
+    cached, generations = top_cache.get_ranking(*date_range)
+    assert cached is None
+    top_cache.set_ranking(*date_range, result, generations, short=short)
+
+
+def cached(date_range):
+    return top_cache.get_ranking(*date_range)[0]
+
+
+def test_invalidate_day():
+    today = date.today()
+    current = (today - timedelta(days=7), today + timedelta(days=1))
+    past = (date(2015, 1, 1), date(2016, 1, 1))
+    cache(current, ['current'])
+    cache(past, ['past'])
+    assert cached(current) == ['current']
+    top_cache.invalidate(day=today)
+    assert cached(current) is None
+    assert cached(past) == ['past']
+    top_cache.invalidate(day=date(2016, 1, 1))
+    assert cached(past) == ['past']
+    top_cache.invalidate(day=date(2015, 6, 1))
+    assert cached(past) is None
+    assert top_cache.stats() == {'hits': 3, 'misses': 4}
+
+
+def test_invalidate_short_and_all():
+    past = (date(2015, 1, 1), date(2016, 1, 1))
+    other = (date(2014, 1, 1), date(2015, 1, 1))
+    cache(past, ['short'], short=True)
+    cache(other, ['full'])
+    top_cache.invalidate(short=True)
+    assert cached(past) is None
+    assert cached(other) == ['full']
+    top_cache.invalidate()
+    assert cached(other) is None
+
+
+def test_ranking_invalidated_while_computed_is_not_served():
+    past = (date(2015, 1, 1), date(2016, 1, 1))
+    _, generations = top_cache.get_ranking(*past)
+    top_cache.invalidate(day=date(2015, 6, 1))
+    top_cache.set_ranking(*past, ['stale'], generations)
+    assert cached(past) is None
+
+
+def test_evicted_generation_is_not_reused():
+    past = (date(2015, 1, 1), date(2016, 1, 1))
+    cache(past, ['past'])
+    top_cache._get_cache().delete(top_cache.GENERATION_KEY)
+    assert cached(past) is None
+
+
+def test_invalidate_after_commit():
+    past = (date(2015, 1, 1), date(2016, 1, 1))
+    cache(past, ['past'])
+    with transaction.atomic():
+        top_cache.invalidate(day=date(2015, 6, 1))
+        assert cached(past) == ['past']
+    assert cached(past) is None
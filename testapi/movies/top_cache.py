@@ -0,0 +1,159 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+
+HITS_KEY = 'top:hits'
+MISSES_KEY = 'top:misses'
+GENERATION_KEY = 'top:generation'
+CURRENT_KEY = 'top:generation:current'
+SHORT_KEY = 'top:generation:short'
+
+
+def _get_cache():
+    return caches[settings.TOP_MOVIES_CACHE_ALIAS]
+
+
+def _key(date_after, date_before):
+    return f'top:{date_after.isoformat()}:{date_before.isoformat()}'
+
+
+def _month_key(day):
+    return f'top:generation:{day:%Y-%m}'
+
+
+def _incr(key):
+    cache = _get_cache()
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def _generation_keys(date_after, date_before):
+    """Keys of the generations a ranking of the range depends on.
+
+    Every month of the range up to today has its own generation, ranges
+    reaching past today also depend on the current generation.
+    """
+    today = timezone.localdate()
+    keys = [GENERATION_KEY, SHORT_KEY]
+    if date_before > today:
+        keys.append(CURRENT_KEY)
+    last_day = min(date_before - timedelta(days=1), today)
+    month = date_after.replace(day=1)
+    while month <= last_day:
+        keys.append(_month_key(month))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return keys
+
+
+def _get_generations(cache, keys, values):
+    """Return generations of keys, missing ones are started afresh.
+
+    A random start makes rankings stored under an evicted generation
+    unreachable, as they could no longer be invalidated. Returns None if
+    a generation got evicted again meanwhile.
+    """
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, random.getrandbits(48), None)
+        values.update(cache.get_many(missing))
+        if any(key not in values for key in keys):
+            return None
+    return {key: values[key] for key in keys}
+
+
+def get_ranking(date_after, date_before):
+    """Return (ranking, generations) of a date range.
+
+    ranking is None on a miss. Pass generations on to set_ranking, a
+    ranking computed while the range got invalidated is then not served.
+    """
+    cache = _get_cache()
+    key = _key(date_after, date_before)
+    keys = _generation_keys(date_after, date_before)
+    values = cache.get_many([key] + keys)
+    cached = values.pop(key, None)
+    generations = _get_generations(cache, keys, values)
+    result = None
+    if cached is not None and generations is not None:
+        cached_generations, cached_result = cached
+        if all(
+                generations.get(generation_key) == generation
+                for generation_key, generation in cached_generations.items()):
+            result = cached_result
+    _incr(MISSES_KEY if result is None else HITS_KEY)
+    return result, generations
+
+
+def set_ranking(date_after, date_before, result, generations, short=False):
+    """Cache ranking of a date range under the generations it was read at.
+
+    Comment changes only invalidate rankings of ranges overlapping the
+    month of the comment, short rankings listing every stored movie are
+    also invalidated by new movies. Ranges that ended before today are
+    cached without expiry.
+    """
+    if generations is None:
+        return
+    if not short:
+        generations = dict(generations)
+        del generations[SHORT_KEY]
+    timeout = (
+        None if date_before <= timezone.localdate()
+        else settings.TOP_MOVIES_CACHE_TIMEOUT
+    )
+    _get_cache().set(
+        _key(date_after, date_before), (generations, result), timeout
+    )
+
+
+def _bump(cache, keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not stored, it starts afresh on the next read.
+            pass
+
+
+def invalidate(day=None, short=False):
+    """Drop cached rankings once the current transaction commits.
+
+    Dropping them earlier would let a concurrent reader cache a ranking
+    of the data before the commit again.
+    """
+    transaction.on_commit(lambda: invalidate_now(day, short))
+
+
+def invalidate_now(day=None, short=False):
+    """Drop cached rankings whose range contains day.
+
+    With short only rankings listing every stored movie are dropped,
+    without either argument every ranking is. Works across processes
+    sharing the cache, invalidated generations are incremented.
+    """
+    cache = _get_cache()
+    if day is None and not short:
+        _bump(cache, [GENERATION_KEY])
+        return
+    keys = []
+    if short:
+        keys.append(SHORT_KEY)
+    if day is not None:
+        keys.append(_month_key(day))
+        if day >= timezone.localdate():
+            keys.append(CURRENT_KEY)
+    _bump(cache, keys)
+
+
+def stats():
+    cache = _get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0)
+    }
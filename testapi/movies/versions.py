@@ -0,0 +1,100 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from movies.routers import primary_reads
+
+
+def _get_cache():
+    return caches[settings.RESOURCE_VERSIONS_CACHE_ALIAS]
+
+
+def _key(scope):
+    return f'version:{scope}'
+
+
+def _new_version():
+    return uuid.uuid4().hex, time.time()
+
+
+def get_version(*scopes):
+    """Return (token, last modified timestamp) of resource scopes.
+
+    Scopes without a stored version get a fresh one, so a version lost
+    from the cache never matches a token handed out before.
+    """
+    cache = _get_cache()
+    keys = [_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_version())
+        versions.update(cache.get_many(missing))
+        # Evicted again meanwhile, do not hand out a token to compare.
+        if any(key not in versions for key in keys):
+            return None, None
+    return (
+        '-'.join(versions[key][0] for key in keys),
+        max(versions[key][1] for key in keys)
+    )
+
+
+def bump(*scopes):
+    """Replace versions of scopes once the current transaction commits.
+
+    Bumping after commit means a reader seeing the new version also sees
+    the committed rows.
+    """
+    transaction.on_commit(lambda: _get_cache().set_many({
+        _key(scope): _new_version() for scope in scopes
+    }))
+
+
+class ConditionalListMixin:
+
+    """Answer list requests with ETag and Last-Modified validators.
+
+    Both come from the versions of version_scopes, a request with a
+    matching If-None-Match or If-Modified-Since gets 304 without running
+    the list query or serializers. Within REPLICA_PIN_SECONDS of a change
+    the list is read from the primary, a lagging replica could return
+    the rows before the change under the new validators.
+    """
+
+    version_scopes = ()
+
+    def get_version_scopes(self):
+        return self.version_scopes
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def conditional(self, list_func, request, *args, **kwargs):
+        token, modified = get_version(*self.get_version_scopes())
+        if (
+                token is None or
+                time.time() - modified < settings.REPLICA_PIN_SECONDS):
+            list_func = primary_reads()(list_func)
+        if token is None:
+            return list_func(request, *args, **kwargs)
+        etag = '"{}"'.format(hashlib.md5('|'.join((
+            token, request.accepted_media_type, request.get_full_path()
+        )).encode('utf-8')).hexdigest())
+        last_modified = int(modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = list_func(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,60 @@
+"""
+ASGI config for testapi project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.1 has no native ASGI handler, so the WSGI application is wrapped and
+each request runs in the event loop's thread pool. An ASGI server can then
+keep many slow requests (e.g. waiting on OMDb) in flight in one process, e.g.
+``uvicorn testapi.asgi:application``.
+"""
+
+import os
+
+from asgiref import wsgi
+from asgiref.sync import sync_to_async
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapi.settings')
+
+
+class WsgiToAsgiInstance(wsgi.WsgiToAsgiInstance):
+
+    """Close the WSGI response once its body has been sent.
+
+    asgiref never calls close(), Django sends request_finished from it and
+    only then returns the thread's database connections.
+    """
+
+    @sync_to_async
+    def run_wsgi_app(self, message):
+        environ = self.build_environ(self.scope, message)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': output,
+                    'more_body': True,
+                })
+        finally:
+            # In the thread the request ran in, its connections are local.
+            close = getattr(response, 'close', None)
+            if close is not None:
+                close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class WsgiToAsgi(wsgi.WsgiToAsgi):
+
+    def __call__(self, scope):
+        return WsgiToAsgiInstance(self.wsgi_application, scope)
+
+
+application = WsgiToAsgi(get_wsgi_application())
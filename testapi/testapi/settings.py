@@ -50,6 +50,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'movies.middleware.ReplicaPinningMiddleware',
+    'movies.middleware.InstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'testapi.urls'
@@ -82,17 +84,102 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# movies.db adds health checks of persistent connections and an
+# optional in-process pool to the PostgreSQL backend. A pooled
+# connection goes back to the pool at the end of every request.
+DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'movies.db',
         'NAME': 'testapi',
         'USER': 'postgres',
         'PASSWORD': 'mysecretpassword',
         'HOST': 'postgres',
         'PORT': '',
+        'CONN_MAX_AGE': 0 if DATABASE_POOL_SIZE else int(
+            os.environ.get('DATABASE_CONN_MAX_AGE', 60)
+        ),
+        'CONN_HEALTH_CHECKS': bool(int(
+            os.environ.get('DATABASE_CONN_HEALTH_CHECKS', 1)
+        )),
+        'POOL': {
+            'SIZE': DATABASE_POOL_SIZE,
+            'OVERFLOW': int(os.environ.get('DATABASE_POOL_OVERFLOW', 5)),
+            'TIMEOUT': float(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+            # Close connections older than this instead of reusing them.
+            'RECYCLE': int(os.environ.get('DATABASE_POOL_RECYCLE', 30 * 60)),
+        } if DATABASE_POOL_SIZE else None,
     }
 }
 
+# Read replicas as a comma separated list of host[:port], they should
+# serve the same database name as the primary. List and ranking
+# endpoints read from them round-robin, see movies.routers.
+DATABASE_REPLICAS = []
+for index, address in enumerate(
+        filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')),
+        start=1):
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{index}'] = dict(
+        DATABASES['default'], HOST=host, PORT=port,
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['movies.routers.ReplicaRouter']
+
+# Replicas are expected to catch up within this many seconds. After a
+# write the client, and after any change the lists with validators, read
+# from the primary for that long.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'omdb': {
+        'BACKEND': os.environ.get(
+            'OMDB_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('OMDB_CACHE_LOCATION', 'omdb'),
+        'TIMEOUT': int(os.environ.get('OMDB_CACHE_TIMEOUT', 60 * 60 * 24)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('OMDB_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+    # Top movies rankings and their generations. Should be shared by all
+    # processes, invalidation only reaches processes using the same cache.
+    'top': {
+        'BACKEND': os.environ.get(
+            'TOP_MOVIES_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('TOP_MOVIES_CACHE_LOCATION', 'top'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('TOP_MOVIES_CACHE_MAX_ENTRIES', 2000)
+            ),
+        },
+    },
+    # Resource versions behind ETag and Last-Modified. Should be shared
+    # by all processes writing movies and comments, with a per process
+    # cache the timeout bounds how long other processes serve 304s.
+    'versions': {
+        'BACKEND': os.environ.get(
+            'VERSIONS_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('VERSIONS_CACHE_LOCATION', 'versions'),
+        'TIMEOUT': int(os.environ.get('VERSIONS_CACHE_TIMEOUT', 60)),
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -132,3 +219,57 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 MOVIES_API_KEY = os.environ['MOVIES_API_KEY']
+
+OMDB_API_URL = os.environ.get('OMDB_API_URL', 'http://www.omdbapi.com/')
+OMDB_POOL_SIZE = int(os.environ.get('OMDB_POOL_SIZE', 10))
+OMDB_CONNECT_TIMEOUT = float(os.environ.get('OMDB_CONNECT_TIMEOUT', 3.05))
+OMDB_READ_TIMEOUT = float(os.environ.get('OMDB_READ_TIMEOUT', 10))
+OMDB_MAX_RETRIES = int(os.environ.get('OMDB_MAX_RETRIES', 3))
+OMDB_BACKOFF_FACTOR = float(os.environ.get('OMDB_BACKOFF_FACTOR', 0.3))
+OMDB_CIRCUIT_FAILURE_THRESHOLD = int(
+    os.environ.get('OMDB_CIRCUIT_FAILURE_THRESHOLD', 5)
+)
+OMDB_CIRCUIT_RESET_TIMEOUT = int(
+    os.environ.get('OMDB_CIRCUIT_RESET_TIMEOUT', 30)
+)
+
+OMDB_CACHE_ALIAS = 'omdb'
+OMDB_NEGATIVE_CACHE_TIMEOUT = int(
+    os.environ.get('OMDB_NEGATIVE_CACHE_TIMEOUT', 60 * 10)
+)
+
+OMDB_IMPORT_CONCURRENCY = int(os.environ.get('OMDB_IMPORT_CONCURRENCY', 8))
+# Either 'threads' or 'asyncio'.
+OMDB_IMPORT_BACKEND = os.environ.get('OMDB_IMPORT_BACKEND', 'threads')
+MOVIES_IMPORT_CHUNK_SIZE = 500
+MOVIES_IMPORT_MAX_ITEMS = 1000
+COMMENTS_BULK_CHUNK_SIZE = int(os.environ.get('COMMENTS_BULK_CHUNK_SIZE', 500))
+COMMENTS_BULK_MAX_ITEMS = 1000
+
+TOP_MOVIES_CACHE_ALIAS = 'top'
+TOP_MOVIES_CACHE_TIMEOUT = int(os.environ.get('TOP_MOVIES_CACHE_TIMEOUT', 60))
+
+RESOURCE_VERSIONS_CACHE_ALIAS = 'versions'
+
+# Log a warning when a view runs more queries than its budget, None
+# disables the check. Budgets per view name override the default one.
+INSTRUMENTATION_QUERY_BUDGET = int(
+    os.environ.get('INSTRUMENTATION_QUERY_BUDGET', 0)
+) or None
+INSTRUMENTATION_QUERY_BUDGETS = {}
+# Log a warning when a request runs the same query this many times.
+INSTRUMENTATION_REPEATED_QUERY_THRESHOLD = 10
+
+# Rows fetched per server side cursor round trip of exports.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+PAGINATION_ESTIMATE_THRESHOLD = 100000
+PAGINATION_COUNT_CAP = 10000
+
+FAST_LIST_SERIALIZATION = bool(int(os.environ.get('FAST_LIST_SERIALIZATION', 0)))
+
+MOVIES_INGESTION_BACKEND = os.environ.get(
+    'MOVIES_INGESTION_BACKEND', 'movies.jobs.DatabaseBackend'
+)
+MOVIES_INGESTION_POLL_INTERVAL = 1
+MOVIES_INGESTION_JOB_TIMEOUT = 5 * 60
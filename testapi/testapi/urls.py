@@ -27,6 +27,28 @@ urlpatterns = [
             'get': 'list'
         }), name='movies'
     ),
+    path(
+        'movies/bulk/',
+        api.MovieViewSet.as_view({'post': 'bulk_fetch_movies'}),
+        name='movies-bulk'
+    ),
+    path(
+        'movies/export/', api.ExportView.as_view(export_name='movies'),
+        name='movies-export'
+    ),
+    path(
+        'movies/jobs/<int:pk>/', api.IngestionJobView.as_view(),
+        name='movie-job'
+    ),
     path('comments/', api.CommentViewSet.as_view(), name='comments'),
-    path('top/', api.TopCommentedMovieViewSet.as_view(), name='top')
+    path(
+        'comments/export/', api.ExportView.as_view(export_name='comments'),
+        name='comments-export'
+    ),
+    path('top/', api.TopCommentedMovieViewSet.as_view(), name='top'),
+    path(
+        'top/cache/', api.TopCommentedMovieCacheStatsView.as_view(),
+        name='top-cache'
+    ),
+    path('metrics/', api.metrics, name='metrics')
 ]